@@ -0,0 +1,9 @@
+@echo off
+title Surface Measurement Tool - Watch folder
+echo.
+echo Watching 'input_images' - drop images in to process them.
+echo The OCR model stays loaded between files. Press Ctrl+C to stop.
+echo.
+if exist .venv\Scripts\activate.bat call .venv\Scripts\activate.bat
+python main.py --watch
+pause
@@ -0,0 +1,76 @@
+"""
+Parallel batch processing across worker processes
+Each worker builds one IndustrialToolAnalyzer (so the OCR model loads once per
+worker) and pulls image paths from the pool's shared task queue.
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+# Analyzer owned by the current worker process
+_worker_analyzer = None
+
+
+def _init_worker(backend: Optional[str] = None):
+    global _worker_analyzer
+    from main import IndustrialToolAnalyzer
+    _worker_analyzer = IndustrialToolAnalyzer(backend=backend)
+
+
+def _process_in_worker(image_path: str, output_name: str) -> Optional[Dict]:
+    try:
+        return _worker_analyzer.process_image(image_path, output_name)
+    except Exception as e:
+        print(f"[ERROR] Processing {image_path} failed: {e}")
+        return None
+
+
+def _new_executor(jobs: int, backend: Optional[str] = None) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(backend,))
+
+
+def iter_parallel(tasks: Iterable[Tuple[str, str]], jobs: int,
+                  backend: Optional[str] = None) -> Iterator[Tuple[str, Optional[Dict]]]:
+    """
+    Process (image_path, output_name) tasks on `jobs` worker processes
+    Yields (image_path, result) in task order; result is None for failed images.
+
+    If a worker process dies (e.g. a native crash inside the OCR engine) the pool
+    is restarted and the tasks that were in flight are retried one at a time, so
+    only the image that actually kills a worker is reported as failed.
+    """
+    tasks = iter(tasks)
+    suspects = deque()
+    inflight = deque()
+    executor = _new_executor(jobs, backend)
+    try:
+        while True:
+            # Keep a small window in flight so memory stays bounded and order is cheap to keep
+            limit = 1 if suspects else jobs * 2
+            while len(inflight) < limit:
+                task = suspects.popleft() if suspects else next(tasks, None)
+                if task is None:
+                    break
+                inflight.append((task, executor.submit(_process_in_worker, *task)))
+            if not inflight:
+                break
+
+            task, future = inflight.popleft()
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                executor.shutdown(wait=False, cancel_futures=True)
+                executor = _new_executor(jobs, backend)
+                if limit == 1:
+                    print(f"[ERROR] Worker process crashed on {task[0]}, skipping it")
+                    yield task[0], None
+                else:
+                    print("[WARN] A worker process crashed, retrying in-flight images one at a time")
+                    retry = [task] + [t for t, _ in inflight]
+                    inflight.clear()
+                    suspects.extendleft(reversed(retry))
+                continue
+            yield task[0], result
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
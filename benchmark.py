@@ -0,0 +1,213 @@
+"""
+Offline benchmark for the measurement pipeline
+Renders synthetic drawings (synthetic_drawings.py), times every stage and
+reports p50/p95 latency, throughput and peak RSS. Results can be saved as a
+baseline and later runs compared against it. OCR is served by the
+deterministic fake backend by default, so no network access or model
+download is needed unless --ocr-backend paddle (or --with-ocr) is given.
+
+    python benchmark.py --count 30 --save-baseline
+    python benchmark.py --count 30            # compare against benchmark_baseline.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+DEFAULT_BASELINE = "benchmark_baseline.json"
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = (len(ordered) - 1) * q
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident set size of this process so far (None where unsupported)
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1)
+
+
+def time_stage(func: Callable, items: List, repeat: int = 1, size: Callable = None) -> Dict:
+    """
+    Call func(item) for every item `repeat` times and summarize the latencies
+    size(item) is the number of images an item holds (batches); throughput counts images.
+    """
+    latencies = []
+    processed = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for item in items:
+            t0 = time.perf_counter()
+            func(item)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            processed += size(item) if size else 1
+    elapsed = time.perf_counter() - start
+    return {
+        'n': len(latencies),
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'mean_ms': round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        'throughput_per_s': round(processed / elapsed, 2) if elapsed > 0 else 0.0,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def run_benchmark(count: int = 20, width: int = 1200, height: int = 900, font_scale: float = 1.0,
+                  noise: float = 0.1, seed: int = 0, repeat: int = 1, ocr_backend: str = 'fake',
+                  ocr_latency_ms: float = 0.0, ocr_batch_size: int = 8) -> Dict:
+    from synthetic_drawings import generate_set
+    from image_preprocessor import ImagePreprocessor
+    from geometry_calculator import GeometryCalculator
+    from smart_calculator import SmartCalculator
+
+    drawings = generate_set(count, width, height, font_scale, noise, seed)
+    images = [img for _, img, _ in drawings]
+    truths = [truth for _, _, truth in drawings]
+    stages = {}
+
+    preprocessor = ImagePreprocessor()
+    preprocessor.output_dir = tempfile.mkdtemp(prefix="bench_processed_")
+    print("Timing ImagePreprocessor.preprocess...")
+    stages['preprocess'] = time_stage(lambda img: preprocessor.preprocess(img, "bench"), images, repeat)
+    print("Timing ImagePreprocessor.preprocess_multiple_versions...")
+    stages['preprocess_multiple_versions'] = time_stage(preprocessor.preprocess_multiple_versions, images, repeat)
+
+    parsed = []
+    try:
+        from ocr_detector import OCRDetector
+        detector = OCRDetector(lazy=True)
+        print("Timing OCRDetector.parse_dimensions (ground-truth detections)...")
+        stages['parse_dimensions'] = time_stage(lambda t: detector.parse_dimensions(t['detections']),
+                                                truths, repeat)
+        parsed = [detector.parse_dimensions(t['detections']) for t in truths]
+        if ocr_backend == 'fake':
+            ocr_detector = OCRDetector(backend='fake', backend_options={'latency_ms': ocr_latency_ms})
+            for img, truth in zip(images, truths):
+                ocr_detector.backend.register(img, truth['detections'])
+        else:
+            ocr_detector = OCRDetector(backend=ocr_backend)
+        print(f"Timing OCRDetector.extract_dimensions ({ocr_backend} backend)...")
+        stages['extract_dimensions'] = time_stage(ocr_detector.extract_dimensions, images, repeat)
+        print(f"Timing OCRDetector.extract_dimensions_batch ({ocr_batch_size} images per call)...")
+        batches = [images[i:i + ocr_batch_size] for i in range(0, len(images), ocr_batch_size)]
+        stages['extract_dimensions_batch'] = time_stage(ocr_detector.extract_dimensions_batch, batches,
+                                                        repeat, size=len)
+    except ImportError as e:
+        print(f"[SKIP] OCR stages unavailable: {e}")
+
+    calculator = GeometryCalculator()
+
+    def geometry(truth):
+        d = truth['dimensions_mm']
+        if truth['shape'] == 'cylinder':
+            return calculator.calculate_cylinder_surface_area(d[0], d[1])
+        if truth['shape'] == 'frustum':
+            return calculator.calculate_frustum_surface_area(d[0], d[1], d[2])
+        return calculator.calculate_rectangular_surface_area(d[0], d[1], d[2])
+
+    print("Timing GeometryCalculator...")
+    stages['geometry'] = time_stage(geometry, truths, repeat * 100)
+
+    if parsed:
+        smart = SmartCalculator()
+        print("Timing SmartCalculator.calculate_smart...")
+        stages['smart_calculator'] = time_stage(lambda dims: smart.calculate_smart(dims, "synthetic"),
+                                                parsed, repeat * 100)
+
+    return {
+        'config': {'count': count, 'width': width, 'height': height, 'font_scale': font_scale,
+                   'noise': noise, 'seed': seed, 'repeat': repeat, 'ocr_backend': ocr_backend,
+                   'ocr_latency_ms': ocr_latency_ms, 'ocr_batch_size': ocr_batch_size},
+        'python': sys.version.split()[0],
+        'stages': stages,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def print_report(report: Dict, baseline: Dict = None, tolerance: float = 0.10) -> List[str]:
+    """
+    Print a stage table (with deltas vs baseline) and return the regressed stages
+    """
+    regressions = []
+    print()
+    print(f"{'stage':32} {'p50 ms':>10} {'p95 ms':>10} {'items/s':>10} {'RSS MB':>8}  vs baseline (p50)")
+    print("-" * 90)
+    for name, s in report['stages'].items():
+        delta = ""
+        if baseline and name in baseline.get('stages', {}):
+            base = baseline['stages'][name]['p50_ms']
+            if base > 0:
+                change = (s['p50_ms'] - base) / base
+                delta = f"{change:+.1%}"
+                if change > tolerance:
+                    delta += "  REGRESSION"
+                    regressions.append(name)
+        rss = s['peak_rss_mb'] if s['peak_rss_mb'] is not None else '-'
+        print(f"{name:32} {s['p50_ms']:>10.3f} {s['p95_ms']:>10.3f} {s['throughput_per_s']:>10.2f} {rss:>8}  {delta}")
+    print()
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline pipeline benchmark on synthetic drawings')
+    parser.add_argument('--count', type=int, default=20, help='Number of synthetic drawings')
+    parser.add_argument('--width', type=int, default=1200)
+    parser.add_argument('--height', type=int, default=900)
+    parser.add_argument('--font-scale', type=float, default=1.0)
+    parser.add_argument('--noise', type=float, default=0.1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=1, help='Passes over the drawing set per stage')
+    parser.add_argument('--ocr-backend', type=str, default='fake', choices=['fake', 'paddle'],
+                        help='OCR engine for the extract_dimensions stage (fake needs no model)')
+    parser.add_argument('--ocr-latency-ms', type=float, default=0.0, help='Simulated latency of the fake backend')
+    parser.add_argument('--ocr-batch-size', type=int, default=8,
+                        help='Images per extract_dimensions_batch call (p50/p95 of that stage are per call)')
+    parser.add_argument('--with-ocr', action='store_true', help='Shorthand for --ocr-backend paddle')
+    parser.add_argument('--output', type=str, default=os.path.join('results', 'benchmark.json'))
+    parser.add_argument('--baseline', type=str, default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='Store this run as the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='Allowed p50 slowdown before flagging')
+    args = parser.parse_args()
+
+    ocr_backend = 'paddle' if args.with_ocr else args.ocr_backend
+    report = run_benchmark(args.count, args.width, args.height, args.font_scale, args.noise,
+                           args.seed, args.repeat, ocr_backend, args.ocr_latency_ms, args.ocr_batch_size)
+
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('config') != report['config']:
+            print("[WARN] Baseline was recorded with a different configuration; deltas are not comparable")
+    regressions = print_report(report, baseline, args.tolerance)
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"✓ Benchmark saved to: {args.output}")
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Baseline saved to: {args.baseline}")
+    if regressions:
+        print(f"✗ Regressions beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,7 +11,7 @@ if sys.platform == 'win32':
 
 import cv2
 import numpy as np
-import easyocr
+from ocr_backends import create_backend
 import re
 import math
 from smart_calculator import SmartCalculator
@@ -23,7 +23,8 @@ print()
 
 # Initialize EasyOCR
 print("Initializing OCR...")
-reader = easyocr.Reader(['en'], gpu=False)
+backend = create_backend('easyocr', lang='en', use_gpu=False)
+backend.load()
 smart_calc = SmartCalculator()
 print("Ready!")
 print()
@@ -103,14 +104,14 @@ for img_file in os.listdir(input_dir):
                 continue
             
             # Run OCR
-            ocr_result = reader.readtext(img_path)
+            ocr_result = backend.readtext(img, source=img_path)
             
             # Extract dimensions
             dimensions = []
             all_text = []
             
             for detection in ocr_result:
-                bbox, text, confidence = detection
+                text, confidence, bbox = detection['text'], detection['confidence'], detection['bbox']
                 all_text.append((text, confidence, bbox))
                 
                 # Find dimensions
@@ -0,0 +1,159 @@
+"""
+Compare OCR backends on a folder of drawings
+For every backend it reports model load time, per-image OCR + parse latency
+(p50/p95, throughput) and dimension recall against ground truth, overall and
+per drawing family. Ground truth comes from `<image>.ocr.json` sidecars as
+written by synthetic_drawings.py ('dimensions_mm', family taken from 'family'
+or 'shape'); images without one count towards latency only.
+
+    python compare_backends.py --dir synthetic_images --backends paddle,easyocr
+    python main.py --dir synthetic_images --compare-backends paddle,easyocr
+"""
+import argparse
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+from benchmark import percentile
+
+
+def load_truth(image_path: str) -> Optional[Dict]:
+    sidecar = os.path.splitext(image_path)[0] + '.ocr.json'
+    if not os.path.exists(sidecar):
+        return None
+    with open(sidecar, 'r', encoding='utf-8') as f:
+        truth = json.load(f)
+    if not isinstance(truth, dict) or 'dimensions_mm' not in truth:
+        return None
+    return truth
+
+
+def match_dimensions(expected_mm: List[float], found_mm: List[float], tolerance: float = 0.01) -> int:
+    """
+    Number of expected values with a detected value within tolerance (relative, at least 0.5 mm)
+    """
+    remaining = list(found_mm)
+    matched = 0
+    for value in expected_mm:
+        allowed = max(0.5, abs(value) * tolerance)
+        for i, candidate in enumerate(remaining):
+            if abs(candidate - value) <= allowed:
+                matched += 1
+                del remaining[i]
+                break
+    return matched
+
+
+def _recall(matched: int, expected: int) -> Optional[float]:
+    return round(matched / expected, 4) if expected else None
+
+
+def compare_backends(input_dir: str, backends: List[str], tolerance: float = 0.01) -> Dict:
+    from image_preprocessor import load_image
+    from main import list_images
+    from ocr_detector import OCRDetector
+
+    files = [os.path.join(input_dir, f) for f in list_images(input_dir)]
+    truths = {path: load_truth(path) for path in files}
+    print(f"Comparing {len(backends)} backend(s) on {len(files)} image(s) "
+          f"({sum(t is not None for t in truths.values())} with ground truth)")
+
+    report = {'input_dir': input_dir, 'images': len(files), 'tolerance': tolerance, 'backends': {}}
+    for name in backends:
+        print(f"\n--- {name} ---")
+        # No result cache: every image is really OCR'd
+        detector = OCRDetector(backend=name, lazy=True)
+        try:
+            t0 = time.perf_counter()
+            detector.backend.load()
+            load_s = time.perf_counter() - t0
+        except Exception as e:
+            print(f"[SKIP] {name} unavailable: {e}")
+            report['backends'][name] = {'error': str(e)}
+            continue
+
+        latencies = []
+        failed = 0
+        expected = matched = 0
+        families = {}
+        for path in files:
+            img = load_image(path)
+            if img is None:
+                failed += 1
+                continue
+            try:
+                t0 = time.perf_counter()
+                dimensions = detector.parse_dimensions(detector.extract_text(img, source=path))
+                latencies.append((time.perf_counter() - t0) * 1000)
+            except Exception as e:
+                print(f"[ERROR] {name} failed on {path}: {e}")
+                failed += 1
+                continue
+            truth = truths[path]
+            if truth is None:
+                continue
+            hits = match_dimensions(truth['dimensions_mm'], [d['value_mm'] for d in dimensions], tolerance)
+            family = families.setdefault(truth.get('family') or truth.get('shape') or 'unlabeled',
+                                         {'expected': 0, 'matched': 0})
+            family['expected'] += len(truth['dimensions_mm'])
+            family['matched'] += hits
+            expected += len(truth['dimensions_mm'])
+            matched += hits
+
+        total_s = sum(latencies) / 1000
+        report['backends'][name] = {
+            'fingerprint': detector.fingerprint,
+            'load_s': round(load_s, 3),
+            'images': len(latencies),
+            'failed': failed,
+            'p50_ms': round(percentile(latencies, 0.50), 3),
+            'p95_ms': round(percentile(latencies, 0.95), 3),
+            'throughput_per_s': round(len(latencies) / total_s, 2) if total_s > 0 else 0.0,
+            'dimensions_expected': expected,
+            'dimensions_matched': matched,
+            'recall': _recall(matched, expected),
+            'families': {
+                family: dict(counts, recall=_recall(counts['matched'], counts['expected']))
+                for family, counts in sorted(families.items())
+            },
+        }
+    return report
+
+
+def print_comparison(report: Dict):
+    print()
+    print(f"{'backend':12} {'load s':>8} {'p50 ms':>10} {'p95 ms':>10} {'img/s':>8} {'recall':>8}  per family")
+    print("-" * 90)
+    for name, r in report['backends'].items():
+        if 'error' in r:
+            print(f"{name:12} unavailable: {r['error']}")
+            continue
+        recall = f"{r['recall']:.1%}" if r['recall'] is not None else '-'
+        families = ", ".join(f"{family} {counts['recall']:.0%}" for family, counts in r['families'].items()
+                             if counts['recall'] is not None)
+        print(f"{name:12} {r['load_s']:>8.2f} {r['p50_ms']:>10.1f} {r['p95_ms']:>10.1f} "
+              f"{r['throughput_per_s']:>8.2f} {recall:>8}  {families}")
+    print()
+
+
+def main():
+    from ocr_backends import available_backends
+    parser = argparse.ArgumentParser(description='Compare OCR backends: latency and dimension recall')
+    parser.add_argument('--dir', type=str, required=True, help='Folder of images (+ .ocr.json ground truth)')
+    parser.add_argument('--backends', type=str, default=','.join(available_backends()),
+                        help='Comma-separated backend names')
+    parser.add_argument('--tolerance', type=float, default=0.01, help='Relative tolerance for a dimension match')
+    parser.add_argument('--output', type=str, default=os.path.join('results', 'backend_comparison.json'))
+    args = parser.parse_args()
+
+    report = compare_backends(args.dir, args.backends.split(','), args.tolerance)
+    print_comparison(report)
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"✓ Comparison saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,11 +8,66 @@ INPUT_DIR = "input_images"
 OUTPUT_DIR = "output_images"
 PROCESSED_DIR = "processed_images"
 RESULTS_DIR = "results"
+CACHE_DIR = "cache"
+
+# Bump whenever a pipeline change should invalidate previously processed results
+PIPELINE_VERSION = "1"
+MANIFEST_PATH = os.path.join(RESULTS_DIR, "manifest.sqlite3")  # Incremental/resumable directory runs
 
 # OCR Settings
 OCR_LANG = 'en'  # English
 OCR_USE_ANGLE_CLS = True
 OCR_USE_GPU = False  # Set to True if you have GPU
+OCR_BACKEND = os.environ.get("OCR_BACKEND", "paddle")  # 'paddle' or 'fake' (deterministic, for tests/CI)
+FAKE_OCR_DIR = os.environ.get("FAKE_OCR_DIR") or None  # Ground-truth sidecars (*.ocr.json) for the fake backend
+FAKE_OCR_LATENCY_MS = float(os.environ.get("FAKE_OCR_LATENCY_MS", "0"))  # Simulated inference time
+# Backends web visitors may choose (comma-separated); every one loads its own model into each worker
+WEB_OCR_BACKENDS = [b.strip() for b in os.environ.get("WEB_OCR_BACKENDS", OCR_BACKEND).split(",") if b.strip()]
+
+# Tiled OCR for large drawings (small text survives; tiles run in parallel)
+OCR_TILE_SIZE = 960  # Tile side in pixels (PaddleOCR's detector works at up to 960 px)
+OCR_TILE_OVERLAP = 200  # Should exceed the width of the longest label
+OCR_TILE_MIN_MEGAPIXELS = 4.0  # Images at least this large are tiled automatically
+OCR_TILE_WORKERS = int(os.environ.get("OCR_TILE_WORKERS", str(min(4, os.cpu_count() or 1))))  # OCR engine instances
+
+# Text-region proposals: recognize only candidate crops on sparse drawings, with
+# full-frame OCR as fallback when the proposals look unreliable
+OCR_TEXT_PROPOSALS = os.environ.get("OCR_TEXT_PROPOSALS", "0") == "1"
+
+# Images per OCR call in directory runs (sequential and --pipeline); above 1,
+# text recognition is batched across the images (OCRDetector.extract_text_batch)
+OCR_BATCH_IMAGES = int(os.environ.get("OCR_BATCH_IMAGES", "1"))
+OCR_RECOGNITION_BATCH_SIZE = 64  # Text-line crops per recognizer call
+
+# Load the OCR model on a background thread when the web server starts, and run
+# one warm-up inference, so the first upload does not pay for it
+OCR_WARMUP = os.environ.get("OCR_WARMUP", "1") != "0"
+# Set by gunicorn.conf.py when the master loads the model before forking workers;
+# background threads are then started in each worker instead of on import
+SERVER_PRELOAD = os.environ.get("SERVER_PRELOAD") == "1"
+
+# Web server job queue: uploads are OCR'd by this many background workers per
+# server process (each shares the warm analyzer; 0 disables processing)
+JOBS_DB_PATH = os.environ.get("JOBS_DB_PATH", os.path.join(CACHE_DIR, "jobs.sqlite3"))
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "1"))
+JOB_STALE_SECONDS = 600  # A running job without a heartbeat for this long is retried (its worker died)
+# Keep a copy of every web upload in INPUT_DIR (written off the request path).
+# With 0, uploads are only decoded in memory; background jobs spool theirs until done
+RETAIN_UPLOADS = os.environ.get("RETAIN_UPLOADS", "1") != "0"
+
+# OCR result cache (keyed by image content hash + OCR engine config)
+OCR_CACHE_ENABLED = os.environ.get("OCR_CACHE", "1") != "0"
+OCR_CACHE_MEMORY_ENTRIES = 256  # In-process LRU tier
+OCR_CACHE_PATH = os.path.join(CACHE_DIR, "ocr_cache.sqlite3")  # On-disk tier
+OCR_CACHE_MAX_MB = 512  # Disk tier size cap before LRU eviction
+
+# Web server result cache (keyed by uploaded file hash + OCR engine config);
+# the disk tier is shared by every server process
+RESULT_CACHE_ENTRIES = 128  # In-process LRU tier
+RESULT_CACHE_MAX_MB = 64  # In-process tier size cap (encoded results)
+RESULT_CACHE_TTL_SECONDS = 24 * 3600
+RESULT_CACHE_PATH = os.path.join(CACHE_DIR, "results.sqlite3")  # On-disk tier
+RESULT_CACHE_DISK_MAX_MB = 256
 
 # Detection Settings
 CONFIDENCE_THRESHOLD = 0.5
@@ -32,6 +87,10 @@ SHAPES = {
     'frustum': ['top_diameter', 'bottom_diameter', 'height', 'slant_height'],
 }
 
-# Create directories
-for dir_path in [INPUT_DIR, OUTPUT_DIR, PROCESSED_DIR, RESULTS_DIR]:
-    os.makedirs(dir_path, exist_ok=True)
+
+def ensure_directories():
+    """
+    Create the working directories; called by the entry points, not on import
+    """
+    for dir_path in [INPUT_DIR, OUTPUT_DIR, PROCESSED_DIR, RESULTS_DIR, CACHE_DIR]:
+        os.makedirs(dir_path, exist_ok=True)
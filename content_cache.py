@@ -0,0 +1,324 @@
+"""
+Content-addressed caching for OCR results
+Entries are keyed by a hash of the decoded pixels plus a fingerprint of the
+OCR engine/config, with an in-process LRU tier in front of an on-disk SQLite tier.
+ResultCache applies the same tiers to whole results, with size and age limits.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+
+def image_digest(img) -> str:
+    """
+    Hash of a decoded image array (shape, dtype and pixel data)
+    """
+    if not img.flags['C_CONTIGUOUS']:
+        img = img.copy()
+    h = hashlib.blake2b(digest_size=20)
+    h.update(f"{img.shape}|{img.dtype}|".encode('ascii'))
+    h.update(memoryview(img).cast('B'))
+    return h.hexdigest()
+
+
+class LRUCache:
+    """
+    Thread-safe in-process LRU keyed by string
+    """
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key: str, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteCache:
+    """
+    On-disk key/value tier with a total size cap
+    Least recently used rows are evicted once the cap is exceeded.
+    The file can be shared between processes; lock contention is treated as a miss.
+    A forked child (e.g. a gunicorn worker of a preloaded app) opens its own
+    connection on first use instead of sharing the parent's.
+    """
+    def __init__(self, path: str, max_bytes: int = 512 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connect()
+
+    def _connect(self):
+        self._pid = os.getpid()
+        self._conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+                "size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS entries_last_access ON entries(last_access)"
+            )
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[bytes]:
+        if self._pid != os.getpid():
+            self._connect()
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT value FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                self._conn.execute(
+                    "UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key)
+                )
+                self._conn.commit()
+                return row[0]
+        except sqlite3.Error:
+            return None
+
+    def put(self, key: str, value: bytes):
+        if self._pid != os.getpid():
+            self._connect()
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, size, last_access) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, value, len(value), time.time()),
+                )
+                self._evict()
+                self._conn.commit()
+        except sqlite3.Error:
+            pass
+
+    def delete(self, key: str):
+        if self._pid != os.getpid():
+            self._connect()
+        try:
+            with self._lock:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._conn.commit()
+        except sqlite3.Error:
+            pass
+
+    def purge(self, before: float):
+        """
+        Delete rows not accessed since the given time
+        """
+        if self._pid != os.getpid():
+            self._connect()
+        try:
+            with self._lock:
+                self._conn.execute("DELETE FROM entries WHERE last_access < ?", (before,))
+                self._conn.commit()
+        except sqlite3.Error:
+            pass
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT key, size FROM entries ORDER BY last_access ASC"
+        ).fetchall()
+        stale = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", stale)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class OCRResultCache:
+    """
+    Two-tier cache of text detections (memory LRU, then SQLite on disk)
+    """
+    def __init__(self, memory_entries: int = 256, disk_path: Optional[str] = None,
+                 disk_max_bytes: int = 512 * 1024 * 1024):
+        self.memory = LRUCache(memory_entries)
+        self.disk = SQLiteCache(disk_path, disk_max_bytes) if disk_path else None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(img, fingerprint: str) -> str:
+        return f"{image_digest(img)}:{fingerprint}"
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        detections = self.memory.get(key)
+        if detections is None and self.disk is not None:
+            blob = self.disk.get(key)
+            if blob is not None:
+                detections = json.loads(blob)
+                self.memory.put(key, detections)
+        with self._lock:
+            if detections is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        # Callers get their own dicts so they cannot mutate cached entries
+        return [dict(d) for d in detections]
+
+    def put(self, key: str, detections: List[Dict]):
+        stored = [
+            {
+                'text': d['text'],
+                'confidence': float(d['confidence']),
+                'bbox': [[float(x), float(y)] for x, y in d['bbox']],
+            }
+            for d in detections
+        ]
+        self.memory.put(key, stored)
+        if self.disk is not None:
+            self.disk.put(key, json.dumps(stored, ensure_ascii=False).encode('utf-8'))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+
+def bytes_hasher():
+    """
+    Incremental bytes_digest: update() it chunk by chunk, then hexdigest()
+    """
+    return hashlib.blake2b(digest_size=20)
+
+
+def bytes_digest(data: bytes) -> str:
+    """
+    Hash of an encoded file's bytes (identical uploads share it)
+    """
+    h = bytes_hasher()
+    h.update(data)
+    return h.hexdigest()
+
+
+class ResultCache:
+    """
+    Bounded cache of JSON-serializable results (e.g. whole analyses)
+    The memory tier is capped by entry count and by encoded size and evicts
+    least recently used entries. Entries are written through to an optional
+    SQLite tier, so processes sharing the file see each other's results and
+    entries evicted from memory are still found on disk. Entries expire after
+    ttl seconds in both tiers; expired disk rows are deleted when looked up,
+    and rows untouched for ttl seconds are purged periodically on put.
+    """
+    # Seconds between sweeps of the disk tier for expired rows (at most ttl)
+    PURGE_INTERVAL = 3600.0
+
+    def __init__(self, max_entries: int = 128, max_bytes: int = 64 * 1024 * 1024, ttl: float = 86400.0,
+                 disk_path: Optional[str] = None, disk_max_bytes: int = 256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.disk = SQLiteCache(disk_path, disk_max_bytes) if disk_path else None
+        # key -> (stored at, encoded size, value)
+        self._data = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._next_purge = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and now - entry[0] > self.ttl:
+                self._drop(key)
+                entry = None
+            if entry is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return json.loads(entry[2])
+        if self.disk is not None:
+            blob = self.disk.get(key)
+            if blob is not None:
+                stored = json.loads(blob)
+                if now - stored['stored_at'] <= self.ttl:
+                    self._remember(key, stored['stored_at'], json.dumps(stored['value'], ensure_ascii=False))
+                    with self._lock:
+                        self.hits += 1
+                    return stored['value']
+                self.disk.delete(key)
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, value):
+        now = time.time()
+        encoded = json.dumps(value, ensure_ascii=False)
+        self._remember(key, now, encoded)
+        if self.disk is not None:
+            self.disk.put(key, json.dumps({'stored_at': now, 'value': value}, ensure_ascii=False).encode('utf-8'))
+            with self._lock:
+                purge = now >= self._next_purge
+                if purge:
+                    self._next_purge = now + min(self.ttl, self.PURGE_INTERVAL)
+            if purge:
+                # A row untouched for ttl seconds was also stored more than ttl ago
+                self.disk.purge(now - self.ttl)
+
+    def _remember(self, key: str, stored_at: float, encoded: str):
+        # Entries are kept encoded: callers always get a fresh copy and the size is exact
+        size = len(encoded)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (stored_at, size, encoded)
+            self._bytes += size
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._data)))
+
+    def _drop(self, key: str):
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._data),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
+
+    def __len__(self):
+        return len(self._data)
@@ -0,0 +1,180 @@
+"""
+Compiled single-pass dimension grammar
+Replaces the loop over six regex patterns in OCRDetector.parse_dimensions.
+One precompiled expression visits every run of digits in a text line once;
+at each run start a lookahead per legacy pattern reports whether (and how)
+that pattern would match there. Replaying those hits per pattern, with the
+same non-overlap rule re.finditer uses, yields exactly the dimensions the old
+parser extracted, in the same order (checked by verify_dimension_grammar.py).
+
+On top of the legacy result every dimension is annotated with:
+  diameter     preceded by a diameter marker (Ø, ⌀, φ, ∅)
+  tuple        all values of an "A x B x C" group it belongs to
+  stated_unit  the unit as written (None when the unit was inferred)
+With extended=True, values written with Korean unit words (밀리미터, 센티, 미터, ...)
+that the legacy patterns cannot see are returned as well.
+"""
+import re
+from typing import Dict, List, Optional
+
+# The legacy patterns, kept for reference; all are applied with re.IGNORECASE
+LEGACY_PATTERNS = [
+    r'(\d+\.?\d*)\s*(cm|mm|m|CM|MM|M)\b',  # Simple dimension with word boundary
+    r'(\d+\.?\d*)\s*x\s*(\d+\.?\d*)\s*(cm|mm|m|CM|MM|M)\b',  # Multiple dimensions
+    r'(\d+\.?\d*)\s*[xX×]\s*(\d+\.?\d*)\s*[xX×]?\s*(\d+\.?\d*)?\s*(cm|mm|m|CM|MM|M)?\b',  # 3D dimensions
+    r'(\d+\.?\d*)\s*(?:CM|MM|M)',  # Uppercase units
+    r'(\d+\.?\d*)\s*(?:centimeter|millimeter|meter)',  # Full words
+    r'\b(\d+\.?\d*)\b',  # Pure numbers (standalone) - assume cm for typical dimension values
+]
+
+_NUM = r'\d+\.?\d*'
+_UNIT = r'cm|mm|m|CM|MM|M'
+
+# The same patterns with named groups: p<k> is the whole match, v<k> the value,
+# u<k> the unit the legacy parser used, s<k> a unit it ignored, t<k>/w<k> further tuple values
+_PATTERNS = [
+    rf'(?P<v0>{_NUM})\s*(?P<u0>{_UNIT})\b',
+    rf'(?P<v1>{_NUM})\s*x\s*(?P<t1>{_NUM})\s*(?P<u1>{_UNIT})\b',
+    rf'(?P<v2>{_NUM})\s*[xX×]\s*(?P<t2>{_NUM})\s*[xX×]?\s*(?P<w2>{_NUM})?\s*(?P<u2>{_UNIT})?\b',
+    rf'(?P<v3>{_NUM})\s*(?P<s3>CM|MM|M)',
+    rf'(?P<v4>{_NUM})\s*(?P<s4>centimeter|millimeter|meter)',
+    rf'\b(?P<v5>{_NUM})\b',
+]
+
+# Every legacy match starts at the first digit of a run, so only run starts are visited.
+# Every unit spelling contains an "m" and tuples need an "x", so lines without
+# them get a grammar with only the patterns that can match there.
+_UNIT_PATTERNS = frozenset((0, 1, 3, 4))
+_TUPLE_PATTERNS = frozenset((1, 2))
+
+
+def _compile(has_unit: bool, has_x: bool):
+    patterns = [k for k in range(len(_PATTERNS))
+                if (has_unit or k not in _UNIT_PATTERNS) and (has_x or k not in _TUPLE_PATTERNS)]
+    grammar = re.compile(
+        r'(?=\d)(?<!\d)' + ''.join(f'(?:(?=(?P<p{k}>{_PATTERNS[k]})))?' for k in patterns) + r'\d+',
+        re.IGNORECASE,
+    )
+    # Per pattern: group indices of (whole, value, unit, written unit, second, third value)
+    groups = [tuple(grammar.groupindex.get(f'{g}{k}') for g in ('p', 'v', 'u', 's', 't', 'w'))
+              for k in patterns]
+    return grammar, groups
+
+
+_GRAMMARS = {(has_unit, has_x): _compile(has_unit, has_x)
+             for has_unit in (False, True) for has_x in (False, True)}
+
+_HAS_DIGIT = re.compile(r'\d')
+# Common OCR mistakes in numbers (same index positions as the original text)
+_CLEAN = str.maketrans({'O': '0', 'o': '0', 'l': '1', 'I': '1'})
+_UNITS = {'cm': 'cm', 'mm': 'mm', 'm': 'm', 'centimeter': 'cm', 'millimeter': 'mm', 'meter': 'm'}
+_TO_MM = {'m': 1000.0, 'cm': 10.0, 'mm': 1.0}
+_DIAMETER_MARKS = frozenset('Øø⌀φΦ∅')
+
+_KOREAN_UNIT = re.compile(
+    r'(?P<value>\d+(?:\.\d+)?)\s*(?P<unit>밀리미터|밀리|센티미터|센티|미터|mm|cm|m)(?![A-Za-z])',
+    re.IGNORECASE,
+)
+_KOREAN_UNITS = {'밀리미터': 'mm', '밀리': 'mm', '센티미터': 'cm', '센티': 'cm', '미터': 'm'}
+
+
+def _group(text: str, regs, index: Optional[int]) -> Optional[str]:
+    if index is None or regs[index][0] < 0:
+        return None
+    return text[regs[index][0]:regs[index][1]]
+
+
+def _is_diameter(text: str, start: int) -> bool:
+    i = start - 1
+    while i >= 0 and text[i] == ' ':
+        i -= 1
+    return i >= 0 and text[i] in _DIAMETER_MARKS
+
+
+def _dimension(value: float, unit: str, item: Dict, full_match: str, stated_unit: Optional[str],
+               diameter: bool, values: Optional[List[float]]) -> Dict:
+    return {
+        'value': value,
+        'value_mm': value * _TO_MM[unit],
+        'unit': unit,
+        'original_text': item['text'],  # Keep original text with Korean characters
+        'confidence': item['confidence'],
+        'bbox': item['bbox'],
+        'full_match': full_match,
+        'diameter': diameter,
+        'tuple': values,
+        'stated_unit': stated_unit,
+    }
+
+
+def parse_dimensions(extracted_data: List[Dict], extended: bool = False) -> List[Dict]:
+    """
+    Dimensions in OCR detections, sorted by confidence (highest first)
+    Identical to the legacy parser (plus annotations) unless extended=True.
+    """
+    dimensions = []
+    seen_dimensions = set()  # Avoid duplicates
+    for item in extracted_data:
+        original_text = item['text']
+        text = original_text.translate(_CLEAN)
+        if not _HAS_DIGIT.search(text):
+            continue
+
+        grammar, groups = _GRAMMARS[('m' in text or 'M' in text,
+                                     'x' in text or 'X' in text or '×' in text)]
+        runs = [m.regs for m in grammar.finditer(text)]
+
+        # Replay pattern by pattern, as the legacy loop did, skipping matches that
+        # overlap the previous one like finditer would (unmatched spans are (-1, -1))
+        for whole, value_group, unit_group, written_group, second_group, third_group in groups:
+            next_start = 0
+            for regs in runs:
+                start, end = regs[whole]
+                if start < next_start:
+                    continue
+                next_start = end
+                value_start, value_end = regs[value_group]
+                value = float(text[value_start:value_end])
+                full_match = text[start:end]
+
+                # Skip very small numbers in parentheses (confidence scores, indices)
+                if value < 2.0 and '(' in original_text and ')' in original_text:
+                    match_start = original_text.find(full_match)
+                    if match_start > 0 and original_text[match_start - 1] == '(':
+                        continue
+
+                legacy_unit = _group(text, regs, unit_group)
+                if legacy_unit:
+                    unit = _UNITS[legacy_unit.lower()]
+                else:
+                    # For numbers < 1000 assume cm, for larger ones mm
+                    unit = 'cm' if value < 1000 else 'mm'
+                written = legacy_unit or _group(text, regs, written_group)
+
+                dim_key = (round(value * _TO_MM[unit], 1), unit)
+                if dim_key in seen_dimensions:
+                    continue
+                seen_dimensions.add(dim_key)
+                values = None
+                if second_group:
+                    values = [value] + [float(g) for g in (_group(text, regs, second_group),
+                                                           _group(text, regs, third_group)) if g]
+                dimensions.append(_dimension(value, unit, item, full_match,
+                                             _UNITS[written.lower()] if written else None,
+                                             _is_diameter(text, value_start), values))
+
+        if extended:
+            for m in _KOREAN_UNIT.finditer(text):
+                written = m.group('unit')
+                unit = _KOREAN_UNITS.get(written) or written.lower()
+                value = float(m.group('value'))
+                dim_key = (round(value * _TO_MM[unit], 1), unit)
+                if dim_key in seen_dimensions:
+                    continue
+                seen_dimensions.add(dim_key)
+                dimensions.append(_dimension(value, unit, item, m.group(), unit,
+                                             _is_diameter(text, m.start()), None))
+
+    # Sort by confidence (highest first)
+    dimensions.sort(key=lambda x: x['confidence'], reverse=True)
+    return dimensions
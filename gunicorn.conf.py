@@ -0,0 +1,104 @@
+"""
+Gunicorn settings for the web server (gunicorn reads ./gunicorn.conf.py by default)
+
+    gunicorn -c gunicorn.conf.py server:app
+
+The app is preloaded: the master imports it, loads and warms the default OCR
+model once, freezes the garbage collector and then forks the workers, which
+share the model's memory copy-on-write and start warm. Set GUNICORN_PRELOAD=0
+to go back to one model load per worker.
+
+Worker count follows the CPU budget (cgroup quota or CPU affinity), capped by
+the container memory limit divided by WORKER_MEMORY_MB; WEB_CONCURRENCY
+overrides it. The OCR engine's own thread pools get the remaining cores, so
+workers x engine threads fits the budget. Each worker serves GUNICORN_THREADS
+request threads.
+"""
+import gc
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+timeout = 300
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") != "0"
+
+
+def cpu_budget() -> int:
+    """
+    CPUs this container may use: the cgroup quota if set, else the affinity mask
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:  # cgroup v2: "<quota> <period>" or "max <period>"
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def memory_budget_mb():
+    """
+    Container memory limit in MB, or None when unlimited/unknown
+    """
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            with open(path) as f:
+                limit = f.read().strip()
+        except OSError:
+            continue
+        if limit.isdigit() and int(limit) < 1 << 60:
+            return int(limit) // (1024 * 1024)
+        return None
+    return None
+
+
+def default_workers() -> int:
+    workers = cpu_budget()
+    memory_mb = memory_budget_mb()
+    if memory_mb:
+        # Per-worker RSS on top of the shared preloaded model
+        per_worker_mb = int(os.environ.get("WORKER_MEMORY_MB", "600"))
+        workers = min(workers, memory_mb // per_worker_mb)
+    return max(1, workers)
+
+
+workers = int(os.environ.get("WEB_CONCURRENCY") or default_workers())
+# Request threads per worker (gthread). Decoding, preprocessing and rendering run
+# in parallel; OCR inference waits for a free engine instance (see README)
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+
+# One OCR engine instance per worker: inference is serialized within a worker,
+# and the only copy of the model is the one shared with the master
+os.environ.setdefault("OCR_TILE_WORKERS", "1")
+
+# Engine threads per worker (read by Paddle/OpenCV/MKL when they load)
+os.environ.setdefault("OMP_NUM_THREADS", str(max(1, cpu_budget() // workers)))
+if preload_app:
+    # Tells server.py to leave its background threads to the workers
+    os.environ["SERVER_PRELOAD"] = "1"
+
+
+def when_ready(arbiter):
+    # Runs in the master after the app is imported and before any worker is forked
+    if not preload_app:
+        return
+    import server as web
+    from config import OCR_WARMUP
+    if OCR_WARMUP:
+        web.preload()
+    # Objects that exist now are never collected; keeping the collector away
+    # from them stops workers from dirtying (and copying) the shared pages
+    gc.collect()
+    gc.freeze()
+    arbiter.log.info("Preloaded app; forking %d worker(s) x %d thread(s), OMP_NUM_THREADS=%s",
+                     workers, threads, os.environ["OMP_NUM_THREADS"])
+
+
+def post_fork(arbiter, worker):
+    if preload_app:
+        import server as web
+        web.start_background()
@@ -6,6 +6,41 @@ import numpy as np
 from PIL import Image, ImageEnhance, ImageFilter
 import os
 
+from timing import span
+
+
+def load_image(source):
+    """
+    Decode an image from a file path, raw encoded bytes or an already-decoded array
+    Returns None if the image cannot be decoded
+    """
+    if isinstance(source, np.ndarray):
+        return source
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return cv2.imdecode(np.frombuffer(source, dtype=np.uint8), cv2.IMREAD_COLOR)
+    
+    # Read image with Unicode path support
+    try:
+        img_array = np.fromfile(source, dtype=np.uint8)
+        img = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
+        if img is None:
+            img = cv2.imread(source)
+    except:
+        img = cv2.imread(source)
+    return img
+
+
+def _describe(source):
+    """
+    Short description of an image source for error messages
+    """
+    if isinstance(source, str):
+        return source
+    if isinstance(source, np.ndarray):
+        return f"<array {source.shape}>"
+    return f"<{len(source)} bytes>"
+
+
 class ImagePreprocessor:
     def __init__(self):
         self.output_dir = "processed_images"
@@ -14,25 +49,22 @@ class ImagePreprocessor:
     def preprocess(self, image_path, output_name=None):
         """
         Enhanced preprocessing pipeline for better OCR results
+        image_path may also be raw image bytes or a decoded BGR array
+        Returns (cleaned, original, enhanced_color, gray); gray is the grayscale
+        image at the input's size, for the OCR stage's text proposals
         """
-        # Read image with Unicode path support
-        try:
-            img_array = np.fromfile(image_path, dtype=np.uint8)
-            img = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
-            if img is None:
-                img = cv2.imread(image_path)
-        except:
-            img = cv2.imread(image_path)
+        img = load_image(image_path)
         
         if img is None:
-            raise ValueError(f"Could not read image: {image_path}")
+            raise ValueError(f"Could not read image: {_describe(image_path)}")
         
         original = img.copy()
         
         # Step 1: Resize if too small (improves OCR accuracy)
         height, width = img.shape[:2]
         min_dimension = 800
-        if height < min_dimension or width < min_dimension:
+        resized = height < min_dimension or width < min_dimension
+        if resized:
             scale = max(min_dimension / height, min_dimension / width)
             new_width = int(width * scale)
             new_height = int(height * scale)
@@ -42,10 +74,11 @@ class ImagePreprocessor:
         gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
         
         # Step 3: Remove noise (multiple methods)
-        # Bilateral filter to preserve edges while removing noise
-        denoised = cv2.bilateralFilter(gray, 9, 75, 75)
-        # Additional denoising for text-heavy images
-        denoised = cv2.fastNlMeansDenoising(denoised, None, 10, 7, 21)
+        with span('preprocess.denoise'):
+            # Bilateral filter to preserve edges while removing noise
+            denoised = cv2.bilateralFilter(gray, 9, 75, 75)
+            # Additional denoising for text-heavy images
+            denoised = cv2.fastNlMeansDenoising(denoised, None, 10, 7, 21)
         
         # Step 4: Enhance contrast using CLAHE (adaptive histogram equalization)
         clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8))
@@ -76,16 +109,19 @@ class ImagePreprocessor:
         
         # Save processed image
         if output_name is None:
-            output_name = os.path.basename(image_path)
+            output_name = os.path.basename(image_path) if isinstance(image_path, str) else "image"
         
         # Ensure .jpg extension for saving
         base_name = os.path.splitext(output_name)[0]
         output_path = os.path.join(self.output_dir, f"processed_{base_name}.jpg")
-        cv2.imwrite(output_path, cleaned)
+        with span('preprocess.write'):
+            cv2.imwrite(output_path, cleaned)
         
         # Also return enhanced color version for OCR (sometimes works better)
         enhanced_color = img.copy()
-        return cleaned, original, enhanced_color
+        # Upscaled images need their own (small) full-size grayscale
+        full_gray = cv2.cvtColor(original, cv2.COLOR_BGR2GRAY) if resized else gray
+        return cleaned, original, enhanced_color, full_gray
     
     def enhance_for_ocr(self, image):
         """
@@ -116,9 +152,9 @@ class ImagePreprocessor:
         """
         Create multiple preprocessed versions and return the best one
         """
-        img = cv2.imread(image_path)
+        img = load_image(image_path)
         if img is None:
-            raise ValueError(f"Could not read image: {image_path}")
+            raise ValueError(f"Could not read image: {_describe(image_path)}")
         
         versions = []
         
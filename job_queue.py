@@ -0,0 +1,239 @@
+"""
+Persistent OCR job queue for the web server
+Uploads are queued in SQLite and processed by a bounded pool of worker
+threads that share the server's warm analyzers, so a request returns a job id
+at once instead of holding a gunicorn worker for the whole OCR run. Jobs that
+are still pending when the process stops are picked up again after a restart.
+Running jobs get a heartbeat, so a job whose worker died mid-run is retried
+once its heartbeat is `stale_after` seconds old, however long a live job takes.
+Several server processes can share one queue file.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+
+
+class JobQueue:
+    """
+    SQLite-backed job queue with an in-process worker pool
+    runner(job) processes one job and returns its JSON-serializable result
+    (None or an exception marks the job failed).
+    """
+    def __init__(self, path: str, runner: Callable[[Dict], Optional[Dict]], workers: int = 1,
+                 stale_after: float = 600.0, max_attempts: int = 3, keep_for: float = 86400.0,
+                 poll_interval: float = 1.0):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.runner = runner
+        self.workers = workers
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+        self.keep_for = keep_for
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+        self._stopped = threading.Event()
+        # Jobs this process is running, kept alive by the heartbeat thread
+        self._running = set()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, image_path TEXT NOT NULL, name TEXT, "
+            "backend TEXT, result TEXT, error TEXT, attempts INTEGER NOT NULL DEFAULT 0, "
+            "created REAL NOT NULL, started REAL, finished REAL, heartbeat REAL)"
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")]
+        if 'heartbeat' not in columns:
+            # Queue files created before heartbeats existed
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat REAL")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created)")
+
+    def start(self):
+        """
+        Start the worker threads (idempotent); pending jobs from earlier runs are resumed
+        """
+        if self._threads:
+            return
+        self._purge()
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'ocr-job-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            thread = threading.Thread(target=self._beat, name='ocr-job-heartbeat', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stopping = True
+        self._stopped.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self._stopping = False
+        self._stopped.clear()
+
+    def submit(self, image_path: str, name: Optional[str] = None, backend: Optional[str] = None,
+               result: Optional[Dict] = None) -> str:
+        """
+        Queue an image (already stored on disk) and return the job id
+        A job whose result is already known (e.g. cached) is stored finished.
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        if result is None:
+            row = (job_id, QUEUED, image_path, name, backend, None, now, None)
+        else:
+            row = (job_id, DONE, image_path, name, backend, json.dumps(result, ensure_ascii=False), now, now)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, image_path, name, backend, result, created, finished) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", row,
+            )
+        if result is None:
+            with self._wakeup:
+                self._wakeup.notify()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, status, image_path, name, backend, result, error, attempts, created, started, finished "
+                "FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._job(row) if row else None
+
+    def depth(self) -> int:
+        """
+        Number of jobs waiting for a worker
+        """
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (QUEUED,)).fetchone()[0]
+
+    @staticmethod
+    def _job(row) -> Dict:
+        keys = ('id', 'status', 'image_path', 'name', 'backend', 'result', 'error', 'attempts',
+                'created', 'started', 'finished')
+        job = dict(zip(keys, row))
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def _claim(self) -> Optional[Dict]:
+        """
+        Atomically take the oldest queued job, or a running one whose worker went away
+        """
+        now = time.time()
+        stale = now - self.stale_after
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, finished = ? "
+                    "WHERE status = ? AND COALESCE(heartbeat, started) < ? AND attempts >= ?",
+                    (FAILED, "Interrupted too many times", now, RUNNING, stale, self.max_attempts),
+                )
+                row = self._conn.execute(
+                    "SELECT id FROM jobs WHERE status = ? OR (status = ? AND COALESCE(heartbeat, started) < ?) "
+                    "ORDER BY created LIMIT 1", (QUEUED, RUNNING, stale)
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, started = ?, heartbeat = ?, attempts = attempts + 1 "
+                        "WHERE id = ?", (RUNNING, now, now, row[0]),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        self._running.add(row[0])
+        try:
+            return self.get(row[0])
+        except Exception:
+            self._running.discard(row[0])
+            raise
+
+    def _finish(self, job_id: str, result: Optional[Dict], error: Optional[str]):
+        try:
+            encoded = json.dumps(result, ensure_ascii=False) if result is not None else None
+        except (TypeError, ValueError) as e:
+            encoded, error = None, f"Result could not be stored: {e}"
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished = ? WHERE id = ?",
+                (DONE if error is None else FAILED, encoded, error, time.time(), job_id),
+            )
+
+    def _beat(self):
+        """
+        Refresh the heartbeat of the jobs this process is running
+        """
+        interval = max(self.stale_after / 4, 0.1)
+        while not self._stopped.wait(interval):
+            running = list(self._running)
+            if not running:
+                continue
+            try:
+                with self._lock:
+                    self._conn.execute(
+                        f"UPDATE jobs SET heartbeat = ? WHERE status = ? AND id IN ({','.join('?' * len(running))})",
+                        (time.time(), RUNNING, *running),
+                    )
+            except sqlite3.Error as e:
+                print(f"[WARN] Job heartbeat failed: {e}")
+
+    def _purge(self):
+        """
+        Forget finished jobs older than keep_for seconds
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM jobs WHERE status IN (?, ?) AND finished < ?",
+                               (DONE, FAILED, time.time() - self.keep_for))
+
+    def _work(self):
+        last_purge = time.monotonic()
+        while not self._stopping:
+            try:
+                job = self._claim()
+            except sqlite3.Error as e:
+                print(f"[WARN] Job queue busy: {e}")
+                job = None
+            if job is None:
+                if time.monotonic() - last_purge > 3600:
+                    try:
+                        self._purge()
+                    except sqlite3.OperationalError as e:
+                        print(f"[WARN] Job queue busy: {e}")
+                    last_purge = time.monotonic()
+                # Jobs submitted by other processes are noticed by polling
+                with self._wakeup:
+                    self._wakeup.wait(self.poll_interval)
+                continue
+            try:
+                try:
+                    result = self.runner(job)
+                    error = None if result is not None else "Processing failed. Check the server logs for details."
+                except Exception as e:
+                    result, error = None, str(e) or type(e).__name__
+                self._finish(job['id'], result, error)
+            except Exception as e:
+                # The worker must survive; without its heartbeat the job is retried once stale
+                print(f"[ERROR] Could not finish job {job['id']}: {e}")
+            finally:
+                self._running.discard(job['id'])
@@ -3,6 +3,7 @@ Main pipeline for OCR-based dimension detection and surface area calculation
 """
 import os
 import sys
+import uuid
 
 # Fix Windows encoding issues
 if sys.platform == 'win32':
@@ -18,82 +19,272 @@ os.environ.setdefault("FLAGS_enable_pir_in_executor", "0")
 os.environ.setdefault("FLAGS_enable_pir", "0")
 os.environ["DISABLE_MODEL_SOURCE_CHECK"] = "True"
 import json
-import cv2
-import numpy as np
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Iterable, Iterator
 import argparse
+import textwrap
+from collections import deque
 
-from image_preprocessor import ImagePreprocessor
-from ocr_detector import OCRDetector
+# cv2/numpy (image_preprocessor, ocr_detector) and the OCR engine are imported on
+# first use, so `--help`, the web server's non-OCR pages and worker start-up stay fast
+from ocr_backends import available_backends
 from geometry_calculator import GeometryCalculator
+from smart_calculator import SmartCalculator
+from content_cache import OCRResultCache, bytes_digest
+from result_writer import JSONLResultWriter, iter_jsonl
+from run_manifest import RunManifest, pipeline_fingerprint
+from timing import StageTimer, span, format_stages, write_chrome_trace
 from config import *
 
 class IndustrialToolAnalyzer:
-    def __init__(self):
+    def __init__(self, lazy_ocr: bool = False, backend: str = None, labeled_by_digest: bool = False):
+        """
+        lazy_ocr defers loading the OCR model until the first detection, for
+        callers that only need the preprocessing, rendering and calculation stages
+        backend names the OCR backend (default: config OCR_BACKEND)
+        labeled_by_digest names each labeled image after its content hash
+        (<digest>.jpg) instead of its input, so concurrent runs never share a file
+        """
+        from image_preprocessor import ImagePreprocessor
+        from ocr_detector import OCRDetector
+        ensure_directories()
+        self.backend_name = backend or OCR_BACKEND
+        self.labeled_by_digest = labeled_by_digest
         self.preprocessor = ImagePreprocessor()
-        self.ocr_detector = OCRDetector(lang=OCR_LANG, use_angle_cls=OCR_USE_ANGLE_CLS, use_gpu=OCR_USE_GPU)
+        ocr_cache = None
+        if OCR_CACHE_ENABLED:
+            ocr_cache = OCRResultCache(
+                memory_entries=OCR_CACHE_MEMORY_ENTRIES,
+                disk_path=OCR_CACHE_PATH,
+                disk_max_bytes=OCR_CACHE_MAX_MB * 1024 * 1024,
+            )
+        self.ocr_detector = OCRDetector(lang=OCR_LANG, use_angle_cls=OCR_USE_ANGLE_CLS,
+                                        use_gpu=OCR_USE_GPU, cache=ocr_cache, lazy=lazy_ocr,
+                                        backend=self.backend_name,
+                                        backend_options={'sidecar_dir': FAKE_OCR_DIR,
+                                                         'latency_ms': FAKE_OCR_LATENCY_MS},
+                                        tile_size=OCR_TILE_SIZE, tile_overlap=OCR_TILE_OVERLAP,
+                                        tile_min_megapixels=OCR_TILE_MIN_MEGAPIXELS,
+                                        tile_workers=OCR_TILE_WORKERS,
+                                        text_proposals=OCR_TEXT_PROPOSALS)
         self.calculator = GeometryCalculator()
+        self.smart_calculator = SmartCalculator()
     
-    def process_image(self, image_path: str, output_name: str = None) -> Dict:
+    def process_image(self, image_path: str, output_name: str = None, image=None,
+                      image_name: str = None) -> Dict:
         """
         Process a single image: preprocess, extract dimensions, calculate surface area
+        image optionally supplies the already-read bytes or decoded array for image_path,
+        so the file is not read from disk again.
+        image_name is the name the image was given (e.g. an upload's original filename)
+        when image_path is not it; it supplies the equipment hints and is kept in the result.
+        The image is decoded once and OCR'd once; the same detections feed
+        dimension parsing, visualization and the smart calculator.
         """
         print(f"\n{'='*60}")
         print(f"Processing: {image_path}")
         print(f"{'='*60}")
         
-        # Preprocess image with enhanced pipeline
+        # Per-stage timings are recorded in result['timings']
+        timer = StageTimer()
+        with timer.activate():
+            result = self._process_stages(image_path, output_name, image, image_name)
+        if result is not None:
+            result['timings'] = timer.as_dict()
+            print(f"[TIME] {format_stages(result['timings'])}")
+        return result
+    
+    def _process_stages(self, image_path: str, output_name: str = None, image=None,
+                        image_name: str = None) -> Dict:
+        img = self.load(image_path, image)
+        if img is None:
+            return None
+        gray = self.preprocess(img, image_path, output_name)
+        if gray is None:
+            return None
+        
+        detection = self.detect(img, image_path, gray)
+        if detection is None:
+            return None
+        return self.finish(img, image_path, output_name, detection, image_name)
+    
+    def process_batch(self, tasks: List[tuple]) -> List[Dict]:
+        """
+        process_image for several (image_path, output_name) tasks, with one OCR
+        call for all of them (recognition batched across images, see detect_batch)
+        Returns one result per task, in order; None for images that failed.
+        The spans of the shared OCR call are part of every image's timings.
+        """
+        timers = [StageTimer() for _ in tasks]
+        loaded = []  # (position, img, gray)
+        for position, ((image_path, output_name), timer) in enumerate(zip(tasks, timers)):
+            print(f"\n{'='*60}")
+            print(f"Processing: {image_path}")
+            print(f"{'='*60}")
+            with timer.activate():
+                img = self.load(image_path)
+                gray = self.preprocess(img, image_path, output_name) if img is not None else None
+            if gray is not None:
+                loaded.append((position, img, gray))
+        
+        batch_timer = StageTimer()
+        with batch_timer.activate():
+            detections = self.detect_batch([img for _, img, _ in loaded],
+                                           [tasks[position][0] for position, _, _ in loaded],
+                                           [gray for _, _, gray in loaded])
+        
+        results = [None] * len(tasks)
+        for (position, img, _), detection in zip(loaded, detections):
+            if detection is None:
+                continue
+            image_path, output_name = tasks[position]
+            timer = timers[position]
+            timer.extend(batch_timer.spans)
+            with timer.activate():
+                result = self.finish(img, image_path, output_name, detection)
+            result['timings'] = timer.as_dict()
+            print(f"[TIME] {image_path}: {format_stages(result['timings'])}")
+            results[position] = result
+        return results
+    
+    def finish(self, img, image_path: str, output_name: str, detection: Dict,
+               image_name: str = None) -> Dict:
+        """
+        Render, calculate and assemble the result from an image's detections
+        """
+        viz_path = self.render(img, image_path, output_name, detection)
+        calculations = self.calculate(detection['dimensions'], image_name or image_path)
+        return self.build_result(image_path, detection['dimensions'], calculations, viz_path, image_name)
+    
+    def load(self, image_path: str, image=None):
+        """
+        Decode the image once; every later stage works on the returned array
+        """
+        from image_preprocessor import load_image
+        with span('decode'):
+            img = load_image(image if image is not None else image_path)
+        if img is None:
+            print(f"[ERROR] Could not read image: {image_path}")
+        return img
+    
+    def preprocess(self, img, image_path: str, output_name: str = None):
+        """
+        Run the enhancement pipeline and save the processed image
+        Returns the grayscale image it computed (reused by detect), or None on failure
+        """
         print("Step 1: Enhanced preprocessing...")
         try:
-            processed_img, original_img, enhanced_color = self.preprocessor.preprocess(image_path, output_name)
+            with span('preprocess'):
+                _, _, _, gray = self.preprocessor.preprocess(img, output_name or os.path.basename(image_path))
             print("[OK] Image preprocessed with multiple enhancement techniques")
+            return gray
         except Exception as e:
             print(f"[ERROR] Preprocessing failed: {e}")
             return None
-        
-        # Extract dimensions using enhanced OCR
+    
+    def detect(self, img, image_path: str = None, gray=None) -> Dict:
+        """
+        Run OCR once and parse dimensions from the detections
+        image_path is only passed on to the OCR backend (the fake backend reads sidecars by it)
+        gray is img's grayscale from preprocess, so text proposals do not convert it again
+        Returns {'detections': [...], 'dimensions': [...]} or None on failure
+        """
         print("Step 2: Extracting dimensions using enhanced OCR...")
         try:
-            # Try with enhanced preprocessing first
-            dimensions = self.ocr_detector.extract_dimensions(image_path, use_enhanced=True)
-            
-            if len(dimensions) == 0:
-                # Fallback to standard extraction
-                print("  Trying alternative preprocessing...")
-                dimensions = self.ocr_detector.extract_dimensions(image_path, use_enhanced=False)
-            
-            print(f"[OK] Found {len(dimensions)} dimension(s)")
-            for dim in dimensions:
-                print(f"  - {dim['value']} {dim['unit']} ({dim['value_mm']} mm) - Confidence: {dim['confidence']:.2f}")
+            with span('ocr'):
+                detections = self.ocr_detector.extract_text(img, source=image_path, gray=gray)
+            return self._parse(detections)
         except Exception as e:
             print(f"[ERROR] OCR extraction failed: {e}")
             return None
+    
+    def detect_batch(self, imgs: List, image_paths: List[str], grays: List = None) -> List[Dict]:
+        """
+        detect() for several images in one OCR call, with text recognition
+        batched across them (OCRDetector.extract_text_batch)
+        Returns one {'detections', 'dimensions'} dict per image; all None on failure
+        """
+        if not imgs:
+            return []
+        print(f"Step 2: Extracting dimensions from {len(imgs)} image(s) in one OCR batch...")
+        try:
+            with span('ocr'):
+                batch = self.ocr_detector.extract_text_batch(imgs, sources=image_paths, grays=grays)
+            return [self._parse(detections) for detections in batch]
+        except Exception as e:
+            print(f"[ERROR] Batched OCR extraction failed: {e}")
+            return [None] * len(imgs)
+    
+    def _parse(self, detections: List[Dict]) -> Dict:
+        with span('parse'):
+            dimensions = self.ocr_detector.parse_dimensions(detections)
         
-        # Enhanced visualization with dimension highlighting
+        print(f"[OK] Found {len(dimensions)} dimension(s)")
+        for dim in dimensions:
+            print(f"  - {dim['value']} {dim['unit']} ({dim['value_mm']} mm) - Confidence: {dim['confidence']:.2f}")
+        return {'detections': detections, 'dimensions': dimensions}
+    
+    def render(self, img, image_path: str, output_name: str, detection: Dict) -> str:
+        """
+        Write the labeled image using the detections already computed
+        """
         if output_name is None:
             output_name = Path(image_path).stem
-        viz_path = os.path.join(OUTPUT_DIR, f"{output_name}_labeled.jpg")
+        viz_path = None if self.labeled_by_digest else os.path.join(OUTPUT_DIR, f"{output_name}_labeled.jpg")
         try:
-            self.ocr_detector.visualize_results(image_path, viz_path, dimensions=dimensions)
+            with span('render'):
+                vis_img = self.ocr_detector.visualize_results(img, viz_path, dimensions=detection['dimensions'],
+                                                              detections=detection['detections'])
+                if self.labeled_by_digest:
+                    viz_path = self._save_by_digest(vis_img)
             print(f"[OK] Enhanced labeled image saved to: {viz_path}")
         except Exception as e:
             print(f"[ERROR] Visualization failed: {e}")
-        
-        # Calculate surface area using smart calculator
+        return viz_path
+    
+    @staticmethod
+    def _save_by_digest(vis_img) -> str:
+        """
+        Write the image to OUTPUT_DIR as <content hash>.jpg, reusing an existing copy
+        """
+        import cv2
+        ok, encoded = cv2.imencode('.jpg', vis_img)
+        if not ok:
+            raise ValueError("could not encode the labeled image")
+        data = encoded.tobytes()
+        path = os.path.join(OUTPUT_DIR, f"{bytes_digest(data)}.jpg")
+        if os.path.exists(path):
+            return path
+        # Written under a private name and renamed, so readers never see a partial file
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return path
+    
+    def calculate(self, dimensions: List[Dict], image_path: str) -> List[Dict]:
+        """
+        Smart surface area calculation, falling back to basic shapes
+        """
         print("Step 3: Smart surface area calculation...")
+        with span('geometry'):
+            return self._calculate(dimensions, image_path)
+    
+    def _calculate(self, dimensions: List[Dict], image_path: str) -> List[Dict]:
         calculations = []
         
         if len(dimensions) >= 2:
-            from smart_calculator import SmartCalculator
-            smart_calc = SmartCalculator()
-            
             img_name = os.path.basename(image_path)
-            calc_result = smart_calc.calculate_smart(dimensions, img_name)
+            calc_result = self.smart_calculator.calculate_smart(dimensions, img_name)
             
             if calc_result:
                 calculations.append(calc_result)
-                eq_type = smart_calc.identify_equipment_type(dimensions, img_name)
+                eq_type = self.smart_calculator.identify_equipment_type(dimensions, img_name)
                 print(f"[OK] Identified as: {eq_type}")
                 print(f"[OK] Surface Area: {calc_result['total_area_cm2']:.2f} cm2 ({calc_result['total_area_m2']:.6f} m2)")
             else:
@@ -110,7 +301,13 @@ class IndustrialToolAnalyzer:
                     calculations.append(calc)
                     print(f"[OK] Calculated as rectangular: {calc['total_area_cm2']:.2f} cm2")
         
-        # Prepare result
+        return calculations
+    
+    def build_result(self, image_path: str, dimensions: List[Dict], calculations: List[Dict],
+                     viz_path: str, image_name: str = None) -> Dict:
+        """
+        Assemble the JSON-serializable result dict
+        """
         result = {
             'image_path': image_path,
             'dimensions_extracted': [
@@ -126,37 +323,87 @@ class IndustrialToolAnalyzer:
             'calculations': calculations,
             'visualization_path': viz_path
         }
-        
+        if image_name is not None:
+            result['image_name'] = image_name
         return result
     
-    def process_directory(self, input_dir: str) -> List[Dict]:
+    def process_directory(self, input_dir: str, jobs: int = 1, manifest=None,
+                          batch_size: int = OCR_BATCH_IMAGES) -> List[Dict]:
         """
         Process all images in a directory
+        With jobs > 1 the images are spread over that many worker processes.
+        With a RunManifest, unchanged images reuse their recorded result.
+        With batch_size > 1 (one process only), that many images share one OCR call.
         """
-        results = []
-        image_extensions = ['.jpg', '.jpeg', '.png', '.bmp', '.tiff']
+        return list(self.iter_directory(input_dir, jobs, manifest, batch_size))
+    
+    def iter_directory(self, input_dir: str, jobs: int = 1, manifest=None,
+                       batch_size: int = OCR_BATCH_IMAGES) -> Iterator[Dict]:
+        """
+        Yield results for a directory one image (or OCR batch) at a time, in file name order
+        """
+        if jobs > 1:
+            yield from iter_directory_parallel(input_dir, jobs, manifest, backend=self.backend_name)
+            return
         
-        for file in os.listdir(input_dir):
-            if any(file.lower().endswith(ext) for ext in image_extensions):
-                image_path = os.path.join(input_dir, file)
-                result = self.process_image(image_path, file)
+        # Entries wait here until batch_size images need processing: (image_path, file, cached, state)
+        entries = []
+        
+        def flush():
+            todo = [(image_path, file) for image_path, file, cached, _ in entries if cached is None]
+            if batch_size > 1:
+                processed = iter(self.process_batch(todo))
+            else:
+                processed = (self.process_image(image_path, file) for image_path, file in todo)
+            for image_path, _, cached, state in entries:
+                if cached is not None:
+                    yield cached
+                    continue
+                result = next(processed)
                 if result:
-                    results.append(result)
+                    if manifest is not None:
+                        manifest.record(image_path, state, result)
+                    yield result
+            entries.clear()
         
-        return results
+        for file in list_images(input_dir):
+            image_path = os.path.join(input_dir, file)
+            cached = state = None
+            if manifest is not None:
+                cached, state = manifest.check(image_path)
+                if cached is not None:
+                    print(f"[SKIP] Unchanged: {image_path}")
+                    if not entries:
+                        yield cached
+                        continue
+            entries.append((image_path, file, cached, state))
+            if sum(1 for entry in entries if entry[2] is None) >= max(batch_size, 1):
+                yield from flush()
+        yield from flush()
     
-    def save_results(self, results: List[Dict], output_file: str = "results.json"):
+    @staticmethod
+    def save_results(results: Iterable[Dict], output_file: str = "results.json"):
         """
         Save results to JSON file
+        results may be any iterable (e.g. iter_jsonl); items are written one at a time
         """
         output_path = os.path.join(RESULTS_DIR, output_file)
         with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(results, f, indent=2, ensure_ascii=False)
+            # Same layout as json.dump(results, indent=2) without holding the whole list
+            f.write("[")
+            count = 0
+            for result in results:
+                f.write(",\n" if count else "\n")
+                f.write(textwrap.indent(json.dumps(result, indent=2, ensure_ascii=False), "  "))
+                count += 1
+            f.write("\n]" if count else "]")
         print(f"\n✓ Results saved to: {output_path}")
     
-    def generate_report(self, results: List[Dict], output_file: str = "report.txt"):
+    @staticmethod
+    def generate_report(results: Iterable[Dict], output_file: str = "report.txt"):
         """
         Generate a text report
+        results may be any iterable, so a report can be streamed from a JSONL file
         """
         output_path = os.path.join(RESULTS_DIR, output_file)
         with open(output_path, 'w', encoding='utf-8') as f:
@@ -186,35 +433,163 @@ class IndustrialToolAnalyzer:
         
         print(f"✓ Report saved to: {output_path}")
 
+IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.bmp', '.tiff']
+
+def list_images(input_dir: str) -> List[str]:
+    """
+    Image file names in a directory, sorted so batch runs are deterministic
+    """
+    return sorted(
+        file for file in os.listdir(input_dir)
+        if any(file.lower().endswith(ext) for ext in IMAGE_EXTENSIONS)
+    )
+
+def iter_directory_parallel(input_dir: str, jobs: int, manifest=None, runner=None,
+                            backend: str = None) -> Iterator[Dict]:
+    """
+    Process a directory on `jobs` worker processes, each with its own analyzer
+    Results are yielded in file name order; images that fail are left out.
+    Images the manifest reports as unchanged are not sent to the workers.
+    runner(tasks) may replace the default process pool, e.g. with the staged pipeline.
+    """
+    from batch_processor import iter_parallel
+    
+    if runner is None:
+        runner = lambda tasks: iter_parallel(tasks, jobs, backend)
+    files = list_images(input_dir)
+    print(f"Processing {len(files)} image(s) with {jobs} worker process(es)...")
+    
+    # Manifest checks run lazily as the pool pulls tasks; plan keeps file order
+    plan = deque()
+    
+    def tasks():
+        for file in files:
+            image_path = os.path.join(input_dir, file)
+            cached, state = manifest.check(image_path) if manifest is not None else (None, None)
+            plan.append((cached, state))
+            if cached is None:
+                yield image_path, file
+            else:
+                print(f"[SKIP] Unchanged: {image_path}")
+    
+    for image_path, result in runner(tasks()):
+        cached, state = plan.popleft()
+        while cached is not None:
+            yield cached
+            cached, state = plan.popleft()
+        if result:
+            if manifest is not None:
+                manifest.record(image_path, state, result)
+            yield result
+    for cached, _ in plan:
+        yield cached
+
+def process_directory_parallel(input_dir: str, jobs: int, manifest=None, backend: str = None) -> List[Dict]:
+    return list(iter_directory_parallel(input_dir, jobs, manifest, backend=backend))
+
+def stream_directory(results: Iterable[Dict], jsonl_file: str = "results.jsonl",
+                     trace_path: str = None) -> int:
+    """
+    Append each result to results/<jsonl_file> as soon as it is ready, then build
+    results.json, the text report and optionally a Chrome trace by streaming over that file
+    Returns the number of results written.
+    """
+    jsonl_path = os.path.join(RESULTS_DIR, jsonl_file)
+    with JSONLResultWriter(jsonl_path) as writer:
+        for result in results:
+            writer.write(result)
+        count = writer.count
+    print(f"\n✓ Streamed {count} result(s) to: {jsonl_path}")
+    
+    if count:
+        IndustrialToolAnalyzer.save_results(iter_jsonl(jsonl_path))
+        IndustrialToolAnalyzer.generate_report(iter_jsonl(jsonl_path))
+        if trace_path:
+            write_chrome_trace(iter_jsonl(jsonl_path), trace_path)
+    return count
+
 def main():
     parser = argparse.ArgumentParser(description='Industrial Tool Dimension Detection and Surface Area Calculator')
     parser.add_argument('--image', type=str, help='Path to single image file')
     parser.add_argument('--dir', type=str, help='Path to directory containing images')
     parser.add_argument('--input-dir', type=str, default=INPUT_DIR, help='Default input directory')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='Worker processes for directory runs (0 = one per CPU core)')
+    parser.add_argument('--force', action='store_true',
+                        help='Reprocess every image even if the manifest says it is unchanged')
+    parser.add_argument('--pipeline', action='store_true',
+                        help='Overlap decode/preprocess, OCR (--jobs processes) and render/write stages')
+    parser.add_argument('--ocr-workers', type=int, default=None,
+                        help='OCR processes for --pipeline (default: --jobs; 0 = OCR on one thread of this process)')
+    parser.add_argument('--ocr-batch', type=int, default=OCR_BATCH_IMAGES,
+                        help='Images per OCR call, with recognition batched across them, for one-process '
+                             f'and --pipeline directory runs (default: {OCR_BATCH_IMAGES})')
+    parser.add_argument('--decode-workers', type=int, default=2, help='Decode/preprocess threads for --pipeline')
+    parser.add_argument('--write-workers', type=int, default=2, help='Render/write threads for --pipeline')
+    parser.add_argument('--trace', type=str, default=None,
+                        help='Write a Chrome trace (chrome://tracing / Perfetto) of all stage timings to this file')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running and process images as they are added to --dir (default: input_images)')
+    parser.add_argument('--backend', type=str, default=OCR_BACKEND, choices=available_backends(),
+                        help=f'OCR backend (default: {OCR_BACKEND})')
+    parser.add_argument('--compare-backends', type=str, default=None, metavar='NAMES',
+                        help='Compare comma-separated OCR backends on --dir (latency, dimension recall) and exit')
     
     args = parser.parse_args()
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    ensure_directories()
+    
+    if args.watch:
+        from watch_folder import run_daemon
+        run_daemon(args.dir or INPUT_DIR, backend=args.backend)
+        return
+    
+    if args.compare_backends:
+        from compare_backends import compare_backends, print_comparison
+        print_comparison(compare_backends(args.dir or INPUT_DIR, args.compare_backends.split(',')))
+        return
     
-    analyzer = IndustrialToolAnalyzer()
+    # Parallel and pipelined directory runs load the model in the workers only
+    analyzer = None
+    if args.image or (jobs == 1 and not args.pipeline):
+        analyzer = IndustrialToolAnalyzer(backend=args.backend)
+    
+    runner = None
+    if args.pipeline:
+        from stage_pipeline import iter_pipeline
+        ocr_workers = jobs if args.ocr_workers is None else args.ocr_workers
+        runner = lambda tasks: iter_pipeline(tasks, ocr_workers=ocr_workers, decode_workers=args.decode_workers,
+                                             write_workers=args.write_workers, backend=args.backend,
+                                             ocr_batch=args.ocr_batch)
+    
+    def run_directory(input_dir):
+        # Unchanged images are skipped; --force reprocesses them and refreshes the manifest
+        batch = args.ocr_batch if analyzer is not None or args.pipeline else 1
+        manifest = RunManifest(MANIFEST_PATH, pipeline_fingerprint(args.backend, batch), force=args.force)
+        try:
+            if analyzer is not None:
+                results = analyzer.iter_directory(input_dir, manifest=manifest, batch_size=args.ocr_batch)
+            else:
+                results = iter_directory_parallel(input_dir, jobs, manifest, runner, args.backend)
+            return stream_directory(results, trace_path=args.trace)
+        finally:
+            manifest.close()
     
     if args.image:
         # Process single image
         result = analyzer.process_image(args.image)
         if result:
-            analyzer.save_results([result], "single_result.json")
-            analyzer.generate_report([result], "single_report.txt")
+            IndustrialToolAnalyzer.save_results([result], "single_result.json")
+            IndustrialToolAnalyzer.generate_report([result], "single_report.txt")
+            if args.trace:
+                write_chrome_trace([result], args.trace)
     elif args.dir:
         # Process directory
-        results = analyzer.process_directory(args.dir)
-        if results:
-            analyzer.save_results(results)
-            analyzer.generate_report(results)
+        run_directory(args.dir)
     else:
         # Process default input directory
         if os.path.exists(INPUT_DIR) and os.listdir(INPUT_DIR):
-            results = analyzer.process_directory(INPUT_DIR)
-            if results:
-                analyzer.save_results(results)
-                analyzer.generate_report(results)
+            run_directory(INPUT_DIR)
         else:
             print(f"Please place images in '{INPUT_DIR}' directory or use --image or --dir arguments")
             print(f"Created '{INPUT_DIR}' directory for you. Please add images and run again.")
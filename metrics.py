@@ -0,0 +1,183 @@
+"""
+Prometheus-style metrics in the text exposition format, without dependencies
+Counters and histograms are in-process objects; an update is one lock and a
+few dict operations, so instrumenting the request path costs next to nothing.
+Gauges are callbacks evaluated only when the metrics are scraped. Under
+gunicorn every worker keeps its own series and a scrape is answered by
+whichever worker receives it, so the registry's constant labels (e.g. the
+worker pid) keep the workers' series apart; aggregate them in queries, e.g.
+sum without (pid) (rate(http_requests_total[5m])).
+"""
+import bisect
+import os
+import sys
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Seconds; pipeline stages range from sub-millisecond parsing to multi-second OCR
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _labels(names: Sequence[str], values: Sequence, *extra: str) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(pair for pair in extra if pair)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    Monotonic count per label combination
+    """
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self, const: str = '') -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_labels(self.labels, key, const)} {_number(value)}" for key, value in values]
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram per label combination
+    """
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last one is +Inf), sum]
+        self._series: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def samples(self, const: str = '') -> List[str]:
+        with self._lock:
+            series = [(key, list(counts), total) for key, (counts, total) in self._series.items()]
+        lines = []
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = 'le="%s"' % _number(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labels, key, const, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key, const)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key, const)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """
+    Value read at scrape time from callback()
+    The callback returns a number, a {label values tuple: number} dict, or None to skip.
+    kind='counter' exports a monotonic count that is kept elsewhere (e.g. cache hits).
+    """
+    def __init__(self, name: str, help: str, callback: Callable, labels: Sequence[str] = (),
+                 kind: str = 'gauge'):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.callback = callback
+        self.kind = kind
+
+    def samples(self, const: str = '') -> List[str]:
+        value = self.callback()
+        if value is None:
+            return []
+        if not isinstance(value, dict):
+            value = {(): value}
+        return [f"{self.name}{_labels(self.labels, key, const)} {_number(v)}"
+                for key, v in value.items() if v is not None]
+
+
+class Registry:
+    def __init__(self, const_labels: Optional[Callable[[], Dict]] = None):
+        """
+        const_labels() returns labels added to every series, read at scrape time
+        (so a pid label is right in processes forked after the registry was built)
+        """
+        self.metrics: List = []
+        self.const_labels = const_labels
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def gauge(self, name: str, help: str, callback: Callable, labels: Sequence[str] = (),
+              kind: str = 'gauge') -> Gauge:
+        return self.register(Gauge(name, help, callback, labels, kind))
+
+    def render(self) -> str:
+        """
+        All metrics in the Prometheus text exposition format (version 0.0.4)
+        """
+        const_labels = self.const_labels() if self.const_labels else {}
+        const = ','.join(f'{name}="{_escape(value)}"' for name, value in const_labels.items())
+        lines = []
+        for metric in self.metrics:
+            try:
+                samples = metric.samples(const)
+            except Exception as e:
+                # One broken gauge must not take the whole endpoint down
+                print(f"[WARN] Metric {metric.name} failed: {e}", file=sys.stderr)
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(samples)
+        return '\n'.join(lines) + '\n'
+
+
+def rss_bytes() -> Optional[int]:
+    """
+    Current resident set size of this process (peak RSS where /proc is unavailable)
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
@@ -0,0 +1,368 @@
+"""
+OCR engine backends behind one interface
+Every backend returns detections in the same normalized shape:
+    [{'text': str, 'confidence': float, 'bbox': float32 array of shape (4, 2)}, ...]
+Backends register themselves by name (create_backend('easyocr'), --backend
+on the CLI) and load their model lazily (load() or the first readtext() call),
+so constructing one is cheap. numpy is imported on first use as well, so
+listing the registered backends (e.g. for `main.py --help`) stays light.
+"""
+from __future__ import annotations
+
+import glob
+import inspect
+import json
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# name -> backend class
+BACKENDS: Dict[str, type] = {}
+
+
+def register_backend(cls):
+    """
+    Class decorator making a backend available to create_backend by its name
+    """
+    BACKENDS[cls.name] = cls
+    return cls
+
+
+def normalize_detection(text, confidence, bbox) -> Dict:
+    import numpy as np
+    return {
+        'text': str(text),
+        'confidence': float(confidence),
+        'bbox': np.asarray(bbox, dtype=np.float32).reshape(-1, 2),
+    }
+
+
+class OCRBackend:
+    """
+    Base class for OCR engines
+    """
+    name = 'base'
+    # Whether crops of a page can be OCR'd separately and merged (tiled OCR)
+    tileable = True
+    # Whether recognize() can read pre-cut text crops without running detection
+    can_recognize = False
+    # Whether detect() finds text boxes without recognizing them
+    can_detect = False
+    # Recognitions below this score are left out of readtext(); detect() + recognize()
+    # callers apply it themselves
+    drop_score = 0.0
+
+    def __init__(self):
+        self._load_lock = threading.Lock()
+        self._loaded = False
+
+    def load(self):
+        """
+        Load the model (idempotent, thread-safe)
+        """
+        with self._load_lock:
+            if not self._loaded:
+                self._load()
+                self._loaded = True
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def _load(self):
+        pass
+
+    def fingerprint(self) -> str:
+        """
+        Identifies engine + settings; part of every OCR cache key
+        """
+        return self.name
+
+    def readtext(self, img, source: Optional[str] = None) -> List[Dict]:
+        """
+        Detect and recognize text in a decoded BGR image
+        source is the image's file path when known (used by sidecar-driven backends)
+        """
+        if not self._loaded:
+            self.load()
+        return self._readtext(img, source)
+
+    def _readtext(self, img, source: Optional[str]) -> List[Dict]:
+        raise NotImplementedError
+
+    def recognize(self, crops: List[np.ndarray]) -> List[Tuple[str, float]]:
+        """
+        Recognition only: one (text, confidence) per text-line crop, in order
+        """
+        if not self._loaded:
+            self.load()
+        if not crops:
+            return []
+        return self._recognize(crops)
+
+    def _recognize(self, crops: List[np.ndarray]) -> List[Tuple[str, float]]:
+        raise NotImplementedError
+
+    def detect(self, img) -> List[np.ndarray]:
+        """
+        Detection only: text-line quadrilaterals (float32 (4, 2)) in reading order
+        """
+        if not self._loaded:
+            self.load()
+        return self._detect(img)
+
+    def _detect(self, img) -> List[np.ndarray]:
+        raise NotImplementedError
+
+
+@register_backend
+class PaddleOCRBackend(OCRBackend):
+    name = 'paddle'
+    can_recognize = True
+    can_detect = True
+    # PaddleOCR's default drop_score for full-frame ocr()
+    drop_score = 0.5
+
+    def __init__(self, lang: str = 'en', use_angle_cls: bool = True, use_gpu: bool = False,
+                 rec_batch_num: int = 6):
+        """
+        rec_batch_num is the number of text-line crops per recognizer call
+        """
+        super().__init__()
+        self.lang = lang
+        self.use_angle_cls = use_angle_cls
+        self.use_gpu = use_gpu
+        self.rec_batch_num = rec_batch_num
+        self.ocr = None
+
+    def _load(self):
+        os.environ.setdefault('DISABLE_MODEL_SOURCE_CHECK', 'True')
+        from paddleocr import PaddleOCR
+        print("Initializing PaddleOCR... This may take a moment on first run.")
+        try:
+            # Try new API first
+            self.ocr = PaddleOCR(lang=self.lang, rec_batch_num=self.rec_batch_num)
+        except:
+            # Fallback to old API
+            try:
+                self.ocr = PaddleOCR(
+                    use_angle_cls=self.use_angle_cls,
+                    lang=self.lang,
+                    rec_batch_num=self.rec_batch_num
+                )
+            except:
+                self.ocr = PaddleOCR(lang='en', rec_batch_num=self.rec_batch_num)
+
+    def fingerprint(self) -> str:
+        try:
+            from importlib.metadata import version
+            engine_version = version('paddleocr')
+        except Exception:
+            engine_version = 'unknown'
+        # Crops are padded to the widest one in their recognizer batch, so the batch size can shift scores
+        return f"paddleocr-{engine_version}|lang={self.lang}|cls={self.use_angle_cls}|rec_batch={self.rec_batch_num}"
+
+    def _readtext(self, img, source: Optional[str]) -> List[Dict]:
+        result = self.ocr.ocr(img)
+        detections = []
+        if result and result[0]:
+            for line in result[0]:
+                if line:
+                    bbox, (text, confidence) = line
+                    detections.append(normalize_detection(text, confidence, bbox))
+        return detections
+
+    def _recognize(self, crops: List[np.ndarray]) -> List[Tuple[str, float]]:
+        # A list nested in a list is one batch for the recognizer (a flat list would be read as pages)
+        result = self.ocr.ocr([crops], det=False, cls=False)
+        return [(text, float(confidence)) for text, confidence in result[0]]
+
+    def _detect(self, img) -> List[np.ndarray]:
+        import numpy as np
+        result = self.ocr.ocr(img, det=True, rec=False, cls=False)
+        if not result or not result[0]:
+            return []
+        return [np.asarray(box, dtype=np.float32).reshape(-1, 2) for box in result[0]]
+
+
+@register_backend
+class EasyOCRBackend(OCRBackend):
+    name = 'easyocr'
+    can_recognize = True
+    can_detect = True
+
+    def __init__(self, lang: str = 'en', use_gpu: bool = False):
+        super().__init__()
+        self.lang = lang
+        self.use_gpu = use_gpu
+        self.reader = None
+
+    def _load(self):
+        import easyocr
+        print("Initializing EasyOCR (this may take a moment on first run)...")
+        self.reader = easyocr.Reader([self.lang], gpu=self.use_gpu)
+
+    def fingerprint(self) -> str:
+        try:
+            from importlib.metadata import version
+            engine_version = version('easyocr')
+        except Exception:
+            engine_version = 'unknown'
+        return f"easyocr-{engine_version}|lang={self.lang}"
+
+    def _readtext(self, img, source: Optional[str]) -> List[Dict]:
+        return [normalize_detection(text, confidence, bbox)
+                for bbox, text, confidence in self.reader.readtext(img)]
+
+    def _recognize(self, crops: List[np.ndarray]) -> List[Tuple[str, float]]:
+        recognized = []
+        for crop in crops:
+            # Without boxes EasyOCR reads the whole crop as one line
+            parts = self.reader.recognize(crop, detail=1)
+            text = " ".join(text for _, text, _ in parts)
+            confidence = min((float(c) for _, _, c in parts), default=0.0)
+            recognized.append((text, confidence))
+        return recognized
+
+    def _detect(self, img) -> List[np.ndarray]:
+        import numpy as np
+        horizontal, free = self.reader.detect(img)
+        boxes = [np.float32([[x0, y0], [x1, y0], [x1, y1], [x0, y1]]) for x0, x1, y0, y1 in horizontal[0]]
+        boxes += [np.asarray(quad, dtype=np.float32).reshape(-1, 2) for quad in free[0]]
+        return boxes
+
+
+@register_backend
+class FakeOCRBackend(OCRBackend):
+    """
+    Deterministic stand-in engine for tests, load tests and CI benchmarks
+    Detections come from, in order:
+      1. a `<image stem>.ocr.json` sidecar next to the source file
+      2. ground truth registered for the image content (register(), or every
+         sidecar in sidecar_dir that carries an `image_digest`, as written by
+         synthetic_drawings.py)
+    Unknown images yield no detections. latency_ms simulates inference time.
+    Ground truth is per page, so the fake backend is never run on tiles.
+    Like the real engines, an instance must not be used by two threads at once;
+    overlapping readtext calls raise, so tests catch unsafe sharing.
+    """
+    name = 'fake'
+    tileable = False
+
+    def __init__(self, sidecar_dir: Optional[str] = None, latency_ms: float = 0.0):
+        super().__init__()
+        self.sidecar_dir = sidecar_dir
+        self.latency_ms = latency_ms
+        self._by_digest: Dict[str, List[Dict]] = {}
+        self._busy = threading.Lock()
+
+    def _load(self):
+        if not self.sidecar_dir:
+            return
+        for path in glob.glob(os.path.join(self.sidecar_dir, '*.ocr.json')):
+            truth = self._read_sidecar(path)
+            if isinstance(truth, dict) and truth.get('image_digest'):
+                self._by_digest[truth['image_digest']] = truth['detections']
+
+    def fingerprint(self) -> str:
+        return f"fake|dir={self.sidecar_dir}|latency={self.latency_ms}"
+
+    def register(self, img, detections: List[Dict]):
+        """
+        Answer `detections` whenever this exact image is OCR'd
+        """
+        from content_cache import image_digest
+        self._by_digest[image_digest(img)] = detections
+
+    @staticmethod
+    def _read_sidecar(path: str):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _readtext(self, img, source: Optional[str]) -> List[Dict]:
+        if not self._busy.acquire(blocking=False):
+            raise RuntimeError("FakeOCRBackend instance used by two threads at once")
+        try:
+            return self._lookup(img, source)
+        finally:
+            self._busy.release()
+
+    def _lookup(self, img, source: Optional[str]) -> List[Dict]:
+        if self.latency_ms > 0:
+            time.sleep(self.latency_ms / 1000)
+        truth = None
+        if source:
+            sidecar = os.path.splitext(source)[0] + '.ocr.json'
+            if os.path.exists(sidecar):
+                truth = self._read_sidecar(sidecar)
+        if truth is None and self._by_digest:
+            from content_cache import image_digest
+            truth = self._by_digest.get(image_digest(img))
+        if isinstance(truth, dict):
+            truth = truth.get('detections')
+        return [normalize_detection(d['text'], d['confidence'], d['bbox']) for d in truth or []]
+
+
+class BackendPool:
+    """
+    Up to `size` backend instances for running OCR on several threads at once
+    OCR engines are not safe to call concurrently, so every thread borrows its
+    own instance. Instances are created (and loaded) on demand by `factory`.
+    """
+    def __init__(self, factory: Callable[[], OCRBackend], size: int = 1, first: Optional[OCRBackend] = None):
+        self._factory = factory
+        self.size = max(1, size)
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        if first is not None:
+            self._idle.put(first)
+            self._created = 1
+
+    @contextmanager
+    def acquire(self):
+        try:
+            backend = self._idle.get_nowait()
+        except queue.Empty:
+            backend = None
+            with self._lock:
+                create = self._created < self.size
+                if create:
+                    self._created += 1
+            if create:
+                try:
+                    backend = self._factory()
+                    backend.load()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                backend = self._idle.get()
+        try:
+            yield backend
+        finally:
+            self._idle.put(backend)
+
+
+def available_backends() -> List[str]:
+    return sorted(BACKENDS)
+
+
+def create_backend(name: str = 'paddle', **options) -> OCRBackend:
+    """
+    Build a registered backend by name
+    Options the backend does not take (e.g. use_angle_cls for EasyOCR) are
+    ignored, so callers can pass one set of engine settings to any backend.
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown OCR backend: {name} (available: {', '.join(available_backends())})")
+    cls = BACKENDS[name]
+    accepted = inspect.signature(cls.__init__).parameters
+    return cls(**{k: v for k, v in options.items() if k in accepted})
@@ -1,191 +1,349 @@
 """
-OCR module using PaddleOCR for dimension detection
+OCR module for dimension detection
+The OCR engine itself lives behind an OCRBackend (ocr_backends.py).
 """
-import os
-os.environ['DISABLE_MODEL_SOURCE_CHECK'] = 'True'
-import re
 import cv2
 import numpy as np
-from paddleocr import PaddleOCR
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Tuple
 import json
 
+from config import OCR_RECOGNITION_BATCH_SIZE
+from dimension_grammar import parse_dimensions
+from image_preprocessor import load_image
+from ocr_backends import BackendPool, OCRBackend, create_backend, normalize_detection
+from ocr_tiling import merge_detections, offset_detections, tile_grid
+from text_proposals import (box_points, crop_quads, crop_regions, propose_text_regions, proposals_reliable,
+                            to_gray)
+from timing import span
+
 class OCRDetector:
-    def __init__(self, lang='en', use_angle_cls=True, use_gpu=False):
+    # Detections below this confidence are dropped
+    MIN_CONFIDENCE = 0.3
+    # Proposal crops that read this badly on average mean the proposals missed the text
+    MIN_PROPOSAL_CONFIDENCE = 0.6
+    # Text-line crops per recognizer call in extract_text_batch
+    RECOGNITION_BATCH_SIZE = OCR_RECOGNITION_BATCH_SIZE
+
+    def __init__(self, lang='en', use_angle_cls=True, use_gpu=False, cache=None, lazy=False,
+                 backend='paddle', backend_options=None, tile_size=960, tile_overlap=200,
+                 tile_min_megapixels=4.0, tile_workers=1, text_proposals=False):
         """
-        Initialize PaddleOCR
+        Initialize the OCR engine
+        backend is a registered backend name ('paddle', 'easyocr', 'fake') or an
+        OCRBackend instance; backend_options are extra settings for create_backend.
+        cache is an optional OCRResultCache shared by every extract_text call.
+        With lazy=True the model is only loaded on the first OCR call, so the
+        parsing and visualization helpers can be used without it.
+        Images of at least tile_min_megapixels are OCR'd as overlapping tiles
+        (0 disables tiling) on up to tile_workers engine instances.
+        OCR calls are thread-safe: every engine call borrows an instance from
+        backend_pool (at most tile_workers, created on demand), so concurrent
+        callers run inference on separate instances or wait for a free one.
+        text_proposals recognizes only classical-CV text-region proposals when the
+        backend supports recognition on crops, falling back to full-frame OCR.
         """
-        print("Initializing PaddleOCR... This may take a moment on first run.")
-        try:
-            # Try new API first
-            self.ocr = PaddleOCR(lang=lang)
-        except:
-            # Fallback to old API
-            try:
-                self.ocr = PaddleOCR(
-                    use_angle_cls=use_angle_cls,
-                    lang=lang
-                )
-            except:
-                self.ocr = PaddleOCR(lang='en')
+        self.cache = cache
+        self.lang = lang
+        self.use_angle_cls = use_angle_cls
+        factory = None
+        if isinstance(backend, OCRBackend):
+            self.backend = backend
+        else:
+            options = {'lang': lang, 'use_angle_cls': use_angle_cls, 'use_gpu': use_gpu,
+                       'rec_batch_num': self.RECOGNITION_BATCH_SIZE}
+            options.update(backend_options or {})
+            factory = lambda: create_backend(backend, **options)
+            self.backend = factory()
+        self.tile_size = tile_size
+        self.tile_overlap = tile_overlap
+        self.tile_min_megapixels = tile_min_megapixels
+        self.text_proposals = text_proposals and self.backend.can_recognize
+        # Instances given by the caller cannot be cloned, so their tiles run one at a time
+        self.backend_pool = BackendPool(factory, tile_workers if factory else 1, first=self.backend)
+        self._tile_executor = None
+        self._executor_lock = threading.Lock()
+        # Identifies engine + settings, so cached results are never reused across configs
+        self.fingerprint = f"{self.backend.fingerprint()}|min_conf={self.MIN_CONFIDENCE}"
+        if self.backend.tileable and tile_min_megapixels > 0:
+            self.fingerprint += f"|tile={tile_size}/{tile_overlap}@{tile_min_megapixels}MP"
+        if self.text_proposals:
+            self.fingerprint += "|proposals"
+        self._warmup_thread = None
+        self._warmed = threading.Event()
+        self.warmup_error = None
+        self.warmup_seconds = None
+        if not lazy:
+            self.backend.load()
         self.dimension_patterns = [
             r'(\d+\.?\d*)\s*(cm|mm|m|CM|MM|M)',  # Simple dimension
             r'(\d+\.?\d*)\s*x\s*(\d+\.?\d*)\s*(cm|mm|m|CM|MM|M)',  # Multiple dimensions
             r'(\d+\.?\d*)\s*[xX×]\s*(\d+\.?\d*)\s*[xX×]?\s*(\d+\.?\d*)?\s*(cm|mm|m|CM|MM|M)?',  # 3D dimensions
         ]
     
-    def extract_text(self, image_path: str, use_multiple_versions=False) -> List[Dict]:
+    def warm_up(self, background=True):
         """
-        Extract all text from image with bounding boxes
-        Enhanced with multiple preprocessing versions for better accuracy
+        Load the model and run one inference on a tiny generated drawing
+        With background=True this runs on a daemon thread and returns at once.
+        OCR calls made meanwhile simply wait for the model (backend.load() is
+        locked); everything else, like parsing, never waits.
         """
-        # Fix Unicode path issues
+        if self._warmup_thread is None:
+            self._warmup_thread = threading.Thread(target=self._warm_up, name='ocr-warmup', daemon=True)
+            self._warmup_thread.start()
+        if not background:
+            self._warmup_thread.join()
+        return self._warmup_thread
+    
+    def _warm_up(self):
+        start = time.perf_counter()
         try:
-            # Try to read with proper encoding
-            img_array = np.fromfile(image_path, dtype=np.uint8)
-            img = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
-            if img is None:
-                # Fallback to regular read
-                img = cv2.imread(image_path)
-        except:
-            img = cv2.imread(image_path)
-        
+            self.backend.load()
+            with self.backend_pool.acquire() as backend:
+                backend.readtext(_warmup_image())
+            print(f"[OK] OCR model ready ({self.backend.name}, {time.perf_counter() - start:.1f}s)")
+        except Exception as e:
+            self.warmup_error = str(e)
+            print(f"[ERROR] OCR warm-up failed: {e}")
+        finally:
+            self.warmup_seconds = round(time.perf_counter() - start, 3)
+            self._warmed.set()
+    
+    @property
+    def ready(self) -> bool:
+        """
+        Whether OCR calls run without waiting for the model to load
+        """
+        if self._warmup_thread is not None:
+            return self._warmed.is_set() and self.warmup_error is None
+        return self.backend.loaded
+    
+    def wait_ready(self, timeout=None) -> bool:
+        """
+        Block until the warm-up has finished (or timeout seconds); returns ready
+        """
+        if self._warmup_thread is not None:
+            self._warmed.wait(timeout)
+        return self.ready
+    
+    def status(self) -> Dict:
+        return {
+            'backend': self.backend.name,
+            'ready': self.ready,
+            'loading': self._warmup_thread is not None and not self._warmed.is_set(),
+            'warmup_seconds': self.warmup_seconds,
+            'error': self.warmup_error,
+        }
+    
+    def extract_text(self, image, use_multiple_versions=False, source=None, gray=None) -> List[Dict]:
+        """
+        Extract all text from image with bounding boxes
+        image can be a file path, raw encoded bytes or an already-decoded BGR array.
+        Arrays are handed to the backend directly, so nothing is re-encoded or written to disk.
+        source is the image's file path when image is already decoded; gray is its
+        grayscale version if the caller already has one (used for text proposals).
+        """
+        if source is None and isinstance(image, str):
+            source = image
+        img = load_image(image)
         if img is None:
             return []
         
-        # Save to temp file with ASCII name for OCR
-        import tempfile
-        temp_fd, temp_path = tempfile.mkstemp(suffix='.jpg')
-        try:
-            cv2.imwrite(temp_path, img)
-            # Use temp file for OCR - simple call
-            result = self.ocr.ocr(temp_path)
-        finally:
-            os.close(temp_fd)
-            if os.path.exists(temp_path):
-                try:
-                    os.remove(temp_path)
-                except:
-                    pass
-        
-        extracted_data = []
-        if result and result[0]:
-            for line in result[0]:
-                if line:
-                    bbox, (text, confidence) = line
-                    # Filter low confidence results
-                    if confidence > 0.3:  # Only keep results with >30% confidence
-                        extracted_data.append({
-                            'text': text,
-                            'confidence': confidence,
-                            'bbox': bbox
-                        })
+        cache_key, cached = self._cache_lookup(img)
+        if cached is not None:
+            return cached
         
-        return extracted_data
+        with span('ocr.engine'):
+            detections = self._readtext(img, source, gray, proposals=self.text_proposals)
+        return self._keep(detections, cache_key)
     
-    def extract_dimensions(self, image_path: str, use_enhanced=True) -> List[Dict]:
+    def extract_text_batch(self, images, sources=None, grays=None) -> List[List[Dict]]:
         """
-        Enhanced dimension extraction with better pattern matching
+        extract_text for many images, with recognition batched across images
+        Text boxes are detected (or proposed) per image, then the crops of all
+        images are recognized together, RECOGNITION_BATCH_SIZE per recognizer call,
+        so the per-call overhead is paid per batch instead of per image.
+        Recognitions below the backend's drop_score are dropped, as full-frame
+        OCR does. The results are cached under their own key, since they can
+        still differ slightly from full-frame OCR (no angle classifier).
+        Backends without a separate detection step, and pages large enough to be
+        tiled, are OCR'd one image at a time as in extract_text.
+        grays optionally supplies each image's grayscale version (for text proposals).
+        Returns one detection list per image, in order.
         """
-        extracted_data = self.extract_text(image_path, use_multiple_versions=use_enhanced)
-        dimensions = []
-        seen_dimensions = set()  # Avoid duplicates
-        
-        # Enhanced patterns for better matching
-        enhanced_patterns = [
-            r'(\d+\.?\d*)\s*(cm|mm|m|CM|MM|M)\b',  # Simple dimension with word boundary
-            r'(\d+\.?\d*)\s*x\s*(\d+\.?\d*)\s*(cm|mm|m|CM|MM|M)\b',  # Multiple dimensions
-            r'(\d+\.?\d*)\s*[xX×]\s*(\d+\.?\d*)\s*[xX×]?\s*(\d+\.?\d*)?\s*(cm|mm|m|CM|MM|M)?\b',  # 3D dimensions
-            r'(\d+\.?\d*)\s*(?:CM|MM|M)',  # Uppercase units
-            r'(\d+\.?\d*)\s*(?:centimeter|millimeter|meter)',  # Full words
-            r'\b(\d+\.?\d*)\b',  # Pure numbers (standalone) - assume cm for typical dimension values
-        ]
+        images = list(images)
+        sources = list(sources) if sources is not None else [None] * len(images)
+        grays = list(grays) if grays is not None else [None] * len(images)
+        batched = self.backend.can_detect and self.backend.can_recognize
+        results = [[] for _ in images]
+        pending = []  # (index, img, source, cache_key, boxes, from_proposals)
+        crops = []
         
-        for item in extracted_data:
-            text = item['text']
-            # Clean text - remove common OCR errors but preserve Korean/Unicode characters
-            # Only replace when it's clearly a mistake (not part of Korean text)
-            original_text = text
-            # Clean common OCR mistakes only for numeric patterns
-            text_clean = text.replace('O', '0').replace('o', '0')  # Common OCR mistake
-            text_clean = text_clean.replace('l', '1').replace('I', '1')  # Another common mistake
+        for index, (image, source, gray) in enumerate(zip(images, sources, grays)):
+            if source is None and isinstance(image, str):
+                source = image
+            img = load_image(image)
+            if img is None:
+                continue
+            if not batched or self._should_tile(img):
+                cache_key, cached = self._cache_lookup(img)
+                if cached is None:
+                    with span('ocr.engine'):
+                        detections = self._readtext(img, source, gray, proposals=self.text_proposals)
+                    cached = self._keep(detections, cache_key)
+                results[index] = cached
+                continue
+            cache_key, cached = self._cache_lookup(img, f"{self.fingerprint}|batched")
+            if cached is not None:
+                results[index] = cached
+                continue
             
-            # Try to match dimension patterns on cleaned text
-            for pattern in enhanced_patterns:
-                matches = re.finditer(pattern, text_clean, re.IGNORECASE)
-                for match in matches:
-                    groups = match.groups()
-                    if len(groups) >= 1:
-                        try:
-                            # Extract numeric value and unit
-                            value = float(groups[0])
-                            
-                            # Skip very small numbers that are likely not dimensions (confidence scores, indices)
-                            # Also skip numbers in parentheses that look like confidence scores (e.g., "(1.00)")
-                            if value < 2.0:
-                                # Check if this number is in parentheses (likely a confidence score)
-                                match_text = match.group()
-                                if '(' in original_text and ')' in original_text:
-                                    # Check if this match is inside parentheses
-                                    match_start = original_text.find(match_text)
-                                    if match_start > 0 and original_text[match_start-1] == '(':
-                                        continue  # Skip confidence scores
-                            
-                            # Find unit
-                            unit = None
-                            for g in groups[1:]:
-                                if g and g.lower() in ['cm', 'mm', 'm', 'centimeter', 'millimeter', 'meter']:
-                                    if 'centimeter' in g.lower() or g.lower() == 'cm':
-                                        unit = 'cm'
-                                    elif 'millimeter' in g.lower() or g.lower() == 'mm':
-                                        unit = 'mm'
-                                    elif 'meter' in g.lower() or g.lower() == 'm':
-                                        unit = 'm'
-                                    break
-                            
-                            # If no unit found (pure number), infer from value range
-                            if unit is None:
-                                # For numbers < 1000, assume cm (common for dimensions)
-                                # For numbers >= 1000, assume mm
-                                if value < 1000:
-                                    unit = 'cm'
-                                else:
-                                    unit = 'mm'
-                            
-                            # Convert to mm for consistency
-                            if unit == 'm':
-                                value_mm = value * 1000
-                            elif unit == 'cm':
-                                value_mm = value * 10
-                            else:
-                                value_mm = value
-                            
-                            # Create unique key to avoid duplicates
-                            dim_key = (round(value_mm, 1), unit)
-                            if dim_key not in seen_dimensions:
-                                seen_dimensions.add(dim_key)
-                                dimensions.append({
-                                    'value': value,
-                                    'value_mm': value_mm,
-                                    'unit': unit,
-                                    'original_text': original_text,  # Keep original text with Korean characters
-                                    'confidence': item['confidence'],
-                                    'bbox': item['bbox'],
-                                    'full_match': match.group()
-                                })
-                        except (ValueError, IndexError):
-                            continue
+            boxes, from_proposals = None, False
+            if self.text_proposals:
+                with span('ocr.proposals'):
+                    proposed = propose_text_regions(to_gray(img, gray))
+                if proposals_reliable(proposed, img.shape):
+                    boxes, from_proposals = [box_points(box) for box in proposed], True
+                    crops.extend(crop_regions(img, proposed))
+            if boxes is None:
+                with span('ocr.detect'), self.backend_pool.acquire() as backend:
+                    boxes = backend.detect(img)
+                crops.extend(crop_quads(img, boxes))
+            pending.append((index, img, source, cache_key, boxes, from_proposals))
         
-        # Sort by confidence (highest first)
-        dimensions.sort(key=lambda x: x['confidence'], reverse=True)
+        recognized = []
+        if crops:
+            size = self.RECOGNITION_BATCH_SIZE
+            with span('ocr.recognize'), self.backend_pool.acquire() as backend:
+                for start in range(0, len(crops), size):
+                    recognized.extend(backend.recognize(crops[start:start + size]))
         
-        return dimensions
+        offset = 0
+        for index, img, source, cache_key, boxes, from_proposals in pending:
+            lines = recognized[offset:offset + len(boxes)]
+            offset += len(boxes)
+            # Detector boxes replace full-frame OCR, so they get its score floor
+            floor = 0.0 if from_proposals else self.backend.drop_score
+            detections = [normalize_detection(text, confidence, box)
+                          for box, (text, confidence) in zip(boxes, lines)
+                          if text.strip() and confidence >= floor]
+            if from_proposals and not self._proposals_confident(detections):
+                # Proposals missed the text: full-frame OCR for this image only
+                with span('ocr.engine'):
+                    detections = self._readtext(img, source)
+            results[index] = self._keep(detections, cache_key)
+        return results
     
-    def visualize_results(self, image_path: str, output_path: str, dimensions=None):
+    def _cache_lookup(self, img, fingerprint=None):
+        """
+        (cache key, cached detections or None); the key is None without a cache
+        fingerprint defaults to self.fingerprint
+        """
+        if self.cache is None:
+            return None, None
+        with span('ocr.cache_lookup'):
+            cache_key = self.cache.make_key(img, fingerprint or self.fingerprint)
+            cached = self.cache.get(cache_key)
+        if cached is None:
+            return cache_key, None
+        return cache_key, [normalize_detection(d['text'], d['confidence'], d['bbox']) for d in cached]
+    
+    def _readtext(self, img, source=None, gray=None, proposals=False) -> List[Dict]:
+        detections = self._readtext_proposals(img, gray) if proposals else None
+        if detections is None and self._should_tile(img):
+            detections = self._readtext_tiled(img)
+        elif detections is None:
+            with self.backend_pool.acquire() as backend:
+                detections = backend.readtext(img, source=source)
+        return detections
+    
+    def _keep(self, detections: List[Dict], cache_key=None) -> List[Dict]:
+        # Filter low confidence results (only keep results with >30% confidence)
+        extracted_data = [d for d in detections if d['confidence'] > self.MIN_CONFIDENCE]
+        
+        if cache_key is not None:
+            self.cache.put(cache_key, extracted_data)
+        return extracted_data
+    
+    def _should_tile(self, img) -> bool:
+        height, width = img.shape[:2]
+        return (self.backend.tileable and self.tile_min_megapixels > 0
+                and height * width >= self.tile_min_megapixels * 1_000_000
+                and max(height, width) > self.tile_size)
+    
+    def _readtext_tiled(self, img) -> List[Dict]:
+        """
+        OCR overlapping tiles in parallel and merge them back into page coordinates
+        """
+        height, width = img.shape[:2]
+        tiles = tile_grid(height, width, self.tile_size, self.tile_overlap)
+        
+        def run(tile):
+            x0, y0, x1, y1 = tile
+            with self.backend_pool.acquire() as backend:
+                found = backend.readtext(np.ascontiguousarray(img[y0:y1, x0:x1]))
+            return offset_detections(found, tile, (height, width))
+        
+        if self.backend_pool.size > 1:
+            with self._executor_lock:
+                if self._tile_executor is None:
+                    self._tile_executor = ThreadPoolExecutor(max_workers=self.backend_pool.size,
+                                                             thread_name_prefix='ocr-tile')
+            results = list(self._tile_executor.map(run, tiles))
+        else:
+            results = [run(tile) for tile in tiles]
+        return merge_detections([d for found in results for d in found])
+    
+    def _readtext_proposals(self, img, gray=None):
+        """
+        Recognize only the proposed text regions in one batch
+        Returns None when full-frame OCR should run instead.
+        """
+        with span('ocr.proposals'):
+            boxes = propose_text_regions(to_gray(img, gray))
+        if not proposals_reliable(boxes, img.shape):
+            return None
+        with self.backend_pool.acquire() as backend:
+            recognized = backend.recognize(crop_regions(img, boxes))
+        detections = [normalize_detection(text, confidence, box_points(box))
+                      for box, (text, confidence) in zip(boxes, recognized) if text.strip()]
+        return detections if self._proposals_confident(detections) else None
+    
+    def _proposals_confident(self, detections: List[Dict]) -> bool:
+        confident = [d['confidence'] for d in detections if d['confidence'] > self.MIN_CONFIDENCE]
+        return bool(confident) and sum(confident) / len(confident) >= self.MIN_PROPOSAL_CONFIDENCE
+    
+    def extract_dimensions(self, image, use_enhanced=True) -> List[Dict]:
+        """
+        Enhanced dimension extraction with better pattern matching
+        image can be a file path, raw encoded bytes or a decoded BGR array
+        """
+        return self.parse_dimensions(self.extract_text(image, use_multiple_versions=use_enhanced))
+    
+    def extract_dimensions_batch(self, images, sources=None) -> List[List[Dict]]:
+        """
+        extract_dimensions for many images, with recognition batched across them (see extract_text_batch)
+        """
+        return [self.parse_dimensions(detections) for detections in self.extract_text_batch(images, sources)]
+    
+    def parse_dimensions(self, extracted_data: List[Dict], extended: bool = False) -> List[Dict]:
+        """
+        Parse dimension values out of detections already returned by extract_text
+        Single pass of the compiled grammar in dimension_grammar; extended=True
+        also returns values written with Korean unit words.
+        """
+        return parse_dimensions(extracted_data, extended=extended)
+    
+    def visualize_results(self, image, output_path: str = None, dimensions=None, detections=None):
         """
         Enhanced visualization with better labeling
+        image can be a file path, raw encoded bytes or a decoded BGR array.
+        Pass detections from extract_text to avoid running OCR again.
+        With output_path None the drawn image is only returned, not written.
         """
-        img = cv2.imread(image_path)
+        img = load_image(image)
         if img is None:
             return None
         
@@ -193,7 +351,7 @@ class OCRDetector:
         vis_img = img.copy()
         
         # Get all text
-        extracted_data = self.extract_text(image_path)
+        extracted_data = detections if detections is not None else self.extract_text(img)
         
         # Draw all text detections
         for item in extracted_data:
@@ -254,5 +412,15 @@ class OCRDetector:
                            (x + 2, y - 8), cv2.FONT_HERSHEY_SIMPLEX, 
                            0.6, (255, 255, 255), 2)
         
-        cv2.imwrite(output_path, vis_img)
+        if output_path is not None:
+            cv2.imwrite(output_path, vis_img)
         return vis_img
+
+
+def _warmup_image() -> np.ndarray:
+    """
+    A tiny drawing label for the warm-up inference (exercises detection and recognition)
+    """
+    img = np.full((64, 256, 3), 255, dtype=np.uint8)
+    cv2.putText(img, "330mm", (16, 44), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 0), 2)
+    return img
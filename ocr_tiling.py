@@ -0,0 +1,93 @@
+"""
+Tiling helpers for OCR on large drawings
+Large sheets are cut into overlapping tiles so the OCR engine sees small
+dimension text at full resolution instead of after internal downscaling.
+Detections from every tile are shifted back to page coordinates and merged:
+duplicates from the overlaps and labels cut at a tile edge are suppressed.
+"""
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Boxes within this many pixels of an inner tile border may be cut off
+EDGE_MARGIN = 3
+
+
+def _starts(length: int, tile: int, step: int) -> List[int]:
+    if length <= tile:
+        return [0]
+    starts = list(range(0, length - tile + 1, step))
+    if starts[-1] != length - tile:
+        starts.append(length - tile)
+    return starts
+
+
+def tile_grid(height: int, width: int, tile_size: int, overlap: int) -> List[Tuple[int, int, int, int]]:
+    """
+    Overlapping tiles covering the page: [(x0, y0, x1, y1), ...]
+    """
+    step = max(1, tile_size - overlap)
+    return [(x, y, min(x + tile_size, width), min(y + tile_size, height))
+            for y in _starts(height, tile_size, step)
+            for x in _starts(width, tile_size, step)]
+
+
+def offset_detections(detections: List[Dict], tile: Tuple[int, int, int, int],
+                      page_size: Tuple[int, int]) -> List[Dict]:
+    """
+    Shift tile detections to page coordinates and flag boxes touching an inner tile border
+    """
+    x0, y0, x1, y1 = tile
+    height, width = page_size
+    shifted = []
+    for d in detections:
+        bbox = np.asarray(d['bbox'], dtype=np.float32).reshape(-1, 2) + np.float32([x0, y0])
+        if len(bbox) == 0:
+            continue
+        bx0, by0 = bbox.min(axis=0)
+        bx1, by1 = bbox.max(axis=0)
+        on_edge = ((x0 > 0 and bx0 - x0 <= EDGE_MARGIN) or (x1 < width and x1 - bx1 <= EDGE_MARGIN) or
+                   (y0 > 0 and by0 - y0 <= EDGE_MARGIN) or (y1 < height and y1 - by1 <= EDGE_MARGIN))
+        shifted.append(dict(d, bbox=bbox, on_edge=on_edge))
+    return shifted
+
+
+def _rect(bbox) -> Tuple[float, float, float, float]:
+    return float(bbox[:, 0].min()), float(bbox[:, 1].min()), float(bbox[:, 0].max()), float(bbox[:, 1].max())
+
+
+def merge_detections(detections: List[Dict], iou_threshold: float = 0.5,
+                     containment_threshold: float = 0.7) -> List[Dict]:
+    """
+    Non-maximum suppression across tiles
+    Boxes well inside a tile win over boxes cut by a tile border, then higher
+    confidence wins. A box is dropped when it overlaps a kept box by IoU, or
+    is mostly contained in it (a label fragment from a neighbouring tile), or
+    repeats the kept box's text at an overlapping position.
+    """
+    ordered = sorted(detections, key=lambda d: (d.get('on_edge', False), -d['confidence']))
+    kept, rects = [], []
+    for d in ordered:
+        ax0, ay0, ax1, ay1 = _rect(d['bbox'])
+        area = max(ax1 - ax0, 1e-6) * max(ay1 - ay0, 1e-6)
+        duplicate = False
+        for k, (bx0, by0, bx1, by1) in zip(kept, rects):
+            iw = min(ax1, bx1) - max(ax0, bx0)
+            ih = min(ay1, by1) - max(ay0, by0)
+            if iw <= 0 or ih <= 0:
+                continue
+            inter = iw * ih
+            other = max(bx1 - bx0, 1e-6) * max(by1 - by0, 1e-6)
+            if (inter / (area + other - inter) >= iou_threshold
+                    or inter / min(area, other) >= containment_threshold
+                    or d['text'].strip() == k['text'].strip()):
+                duplicate = True
+                break
+        if not duplicate:
+            kept.append(d)
+            rects.append((ax0, ay0, ax1, ay1))
+    for d in kept:
+        d.pop('on_edge', None)
+    # Reading order, like a full-page OCR pass
+    kept.sort(key=lambda d: (round(float(d['bbox'][:, 1].min()) / 10), float(d['bbox'][:, 0].min())))
+    return kept
@@ -11,7 +11,7 @@ if sys.platform == 'win32':
 
 import cv2
 import numpy as np
-import easyocr
+from ocr_backends import create_backend
 import re
 
 print("="*80)
@@ -20,8 +20,8 @@ print("="*80)
 print()
 
 # Initialize EasyOCR
-print("Initializing EasyOCR (this may take a moment on first run)...")
-reader = easyocr.Reader(['en'], gpu=False)
+backend = create_backend('easyocr', lang='en', use_gpu=False)
+backend.load()
 print("Ready!")
 print()
 
@@ -52,14 +52,14 @@ for img_file in os.listdir(input_dir):
                 continue
             
             # Run EasyOCR
-            ocr_result = reader.readtext(img_path)
+            ocr_result = backend.readtext(img, source=img_path)
             
             # Extract dimensions
             dimensions = []
             all_text = []
             
             for detection in ocr_result:
-                bbox, text, confidence = detection
+                text, confidence, bbox = detection['text'], detection['confidence'], detection['bbox']
                 all_text.append((text, confidence, bbox))
                 
                 # Find dimensions
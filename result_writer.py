@@ -0,0 +1,71 @@
+"""
+Streaming JSONL output for batch runs
+Each result is appended as one line as soon as it is ready, so memory stays flat
+and everything written before a crash survives it.
+"""
+import json
+import os
+import time
+from typing import Dict, Iterator
+
+
+class JSONLResultWriter:
+    """
+    Append result dicts to a JSONL file with periodic fsync
+    """
+    def __init__(self, path: str, append: bool = False, fsync_every: int = 50,
+                 fsync_interval: float = 5.0):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.count = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._file = open(path, 'a' if append else 'w', encoding='utf-8')
+
+    def write(self, result: Dict):
+        self._file.write(json.dumps(result, ensure_ascii=False) + "\n")
+        self.count += 1
+        self._unsynced += 1
+        if (self._unsynced >= self.fsync_every
+                or time.monotonic() - self._last_sync >= self.fsync_interval):
+            self.sync()
+
+    def sync(self):
+        """
+        Flush buffered lines and force them to disk
+        """
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def iter_jsonl(path: str) -> Iterator[Dict]:
+    """
+    Stream result dicts back from a JSONL file
+    A torn last line left by a crash is skipped instead of aborting the read.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                print(f"[WARN] Skipping unreadable line in {path}")
@@ -0,0 +1,128 @@
+"""
+Manifest of processed inputs for incremental and resumable directory runs
+For every image it records the content hash, mtime/size and the pipeline
+fingerprint that produced its result. Reruns skip images whose content and
+pipeline are unchanged, and an interrupted run resumes where it stopped
+because each result is committed as soon as it is produced.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from config import (PIPELINE_VERSION, OCR_BACKEND, OCR_LANG, OCR_USE_ANGLE_CLS, OCR_USE_GPU,
+                    CONFIDENCE_THRESHOLD, OUTPUT_DIR, OCR_TILE_SIZE, OCR_TILE_OVERLAP,
+                    OCR_TILE_MIN_MEGAPIXELS, OCR_TEXT_PROPOSALS, OCR_RECOGNITION_BATCH_SIZE)
+
+
+def pipeline_fingerprint(backend: Optional[str] = None, batch: int = 1) -> str:
+    """
+    Pipeline version plus the config and engine version that affect results
+    Computed without importing the OCR engine. backend defaults to OCR_BACKEND;
+    batch is the number of images per OCR call (above 1, recognition is batched).
+    """
+    try:
+        from importlib.metadata import version
+        engine_version = version('paddleocr')
+    except Exception:
+        engine_version = 'unknown'
+    parts = [
+        f"v={PIPELINE_VERSION}",
+        f"paddleocr={engine_version}",
+        f"backend={backend or OCR_BACKEND}",
+        f"lang={OCR_LANG}",
+        f"cls={OCR_USE_ANGLE_CLS}",
+        f"gpu={OCR_USE_GPU}",
+        f"conf={CONFIDENCE_THRESHOLD}",
+        f"out={OUTPUT_DIR}",
+        f"tile={OCR_TILE_SIZE}/{OCR_TILE_OVERLAP}/{OCR_TILE_MIN_MEGAPIXELS}",
+        f"proposals={OCR_TEXT_PROPOSALS}",
+        f"batched={batch > 1}",
+        f"rec_batch={OCR_RECOGNITION_BATCH_SIZE}",
+    ]
+    return "|".join(parts)
+
+
+def file_digest(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.file_digest(f, 'sha256').hexdigest()
+
+
+class RunManifest:
+    """
+    SQLite-backed record of which inputs have been processed, and with what
+    """
+    def __init__(self, path: str, pipeline_key: Optional[str] = None, force: bool = False):
+        """
+        force makes check() report every image as changed while still recording results
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.pipeline_key = pipeline_key or pipeline_fingerprint()
+        self.force = force
+        # Checks may come from a feeder thread while results are recorded on another
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS inputs ("
+            "path TEXT PRIMARY KEY, digest TEXT NOT NULL, mtime_ns INTEGER NOT NULL, "
+            "size INTEGER NOT NULL, pipeline TEXT NOT NULL, result TEXT NOT NULL, "
+            "updated REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def check(self, image_path: str) -> Tuple[Optional[Dict], Optional[Dict]]:
+        """
+        Returns (stored_result, None) when the image can be skipped, otherwise
+        (None, state) where state must be passed to record() after processing.
+        mtime/size are checked first so unchanged files are not even hashed.
+        """
+        with self._lock:
+            return self._check(image_path)
+
+    def _check(self, image_path: str) -> Tuple[Optional[Dict], Optional[Dict]]:
+        key = os.path.abspath(image_path)
+        st = os.stat(image_path)
+        if self.force:
+            return None, {'digest': file_digest(image_path), 'mtime_ns': st.st_mtime_ns,
+                          'size': st.st_size}
+        row = self._conn.execute(
+            "SELECT digest, mtime_ns, size, pipeline, result FROM inputs WHERE path = ?", (key,)
+        ).fetchone()
+        same_pipeline = row is not None and row[3] == self.pipeline_key
+        if same_pipeline and row[1] == st.st_mtime_ns and row[2] == st.st_size:
+            return json.loads(row[4]), None
+
+        digest = file_digest(image_path)
+        if same_pipeline and row[0] == digest:
+            # Touched but not modified: refresh the stat fields and reuse the result
+            self._conn.execute(
+                "UPDATE inputs SET mtime_ns = ?, size = ? WHERE path = ?",
+                (st.st_mtime_ns, st.st_size, key),
+            )
+            self._conn.commit()
+            return json.loads(row[4]), None
+        return None, {'digest': digest, 'mtime_ns': st.st_mtime_ns, 'size': st.st_size}
+
+    def record(self, image_path: str, state: Dict, result: Dict):
+        """
+        Commit a successful result; failed images are not recorded so they are retried
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO inputs (path, digest, mtime_ns, size, pipeline, result, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (os.path.abspath(image_path), state['digest'], state['mtime_ns'], state['size'],
+                 self.pipeline_key, json.dumps(result, ensure_ascii=False), time.time()),
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
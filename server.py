@@ -4,9 +4,16 @@ Local web server for uploading an image and getting measurements.
 from __future__ import annotations
 
 import argparse
+import functools
+import io
 import os
+import re
 import sys
+import threading
+import time
 import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
 from pathlib import Path
 
 # Fix Windows encoding issues
@@ -16,49 +23,143 @@ if sys.platform == 'win32':
     sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
     os.environ['PYTHONIOENCODING'] = 'utf-8'
 
-from flask import Flask, abort, render_template_string, request, send_from_directory, url_for
+from flask import Flask, Response, abort, g, jsonify, render_template_string, request, send_from_directory, url_for
 from werkzeug.utils import secure_filename
 
-from config import INPUT_DIR, OUTPUT_DIR
+from config import (INPUT_DIR, JOB_STALE_SECONDS, JOB_WORKERS, JOBS_DB_PATH, OCR_BACKEND, OCR_WARMUP,
+                    OUTPUT_DIR, RESULT_CACHE_DISK_MAX_MB, RESULT_CACHE_ENTRIES, RESULT_CACHE_MAX_MB,
+                    RESULT_CACHE_PATH, RESULT_CACHE_TTL_SECONDS, RETAIN_UPLOADS, SERVER_PRELOAD,
+                    WEB_OCR_BACKENDS)
+from content_cache import ResultCache, bytes_digest, bytes_hasher
 from main import IndustrialToolAnalyzer
+from job_queue import JobQueue
+from metrics import Registry, rss_bytes
+from ocr_backends import available_backends
+from run_manifest import pipeline_fingerprint
 from geometry_calculator import GeometryCalculator
 from smart_calculator import SmartCalculator
 
 BASE_DIR = Path(__file__).resolve().parent
 UPLOAD_DIR = BASE_DIR / INPUT_DIR
+# Inputs of background jobs when uploads are not retained; removed once the job ends
+JOB_SPOOL_DIR = UPLOAD_DIR / ".jobs"
 OUTPUT_DIR_PATH = BASE_DIR / OUTPUT_DIR
 
 ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".tiff"}
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Content-addressed files never change, so browsers may keep them for a year
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
 
 app = Flask(__name__)
 app.config["MAX_CONTENT_LENGTH"] = 25 * 1024 * 1024  # 25 MB
 
-analyzer: IndustrialToolAnalyzer | None = None
+# One analyzer (and model) per OCR backend that has been requested
+analyzers: dict[str, IndustrialToolAnalyzer] = {}
+analyzers_lock = threading.Lock()
 calculator = GeometryCalculator()
 smart_calculator = SmartCalculator()
-results_cache: dict[str, dict] = {}
+# Finished analyses by uploaded content; created on first use
+results_cache: ResultCache | None = None
+results_cache_lock = threading.Lock()
+# Retained uploads still being written by the background writer: stored name -> write
+pending_uploads: dict[str, Future] = {}
+upload_writer: ThreadPoolExecutor | None = None
+upload_writer_lock = threading.Lock()
+# Background OCR jobs (POST /api/jobs); created on first use
+job_queue: JobQueue | None = None
+job_queue_lock = threading.Lock()
 
 DATASET_DIR = BASE_DIR / "Dataset"
 
+# Pipeline stages reported per analysis (StageTimer top-level spans)
+PIPELINE_STAGES = ("decode", "preprocess", "ocr", "parse", "geometry", "render")
+
+# Every gunicorn worker keeps its own series; the pid label tells them apart
+registry = Registry(const_labels=lambda: {"pid": os.getpid()})
+http_requests = registry.counter("http_requests_total", "HTTP requests served", ("endpoint", "method", "status"))
+http_seconds = registry.histogram("http_request_duration_seconds", "HTTP request latency", ("endpoint",))
+analyses = registry.counter("analyses_total", "Image analyses by outcome (processed, cached, failed)", ("outcome",))
+stage_seconds = registry.histogram("pipeline_stage_duration_seconds", "Time per pipeline stage of processed images",
+                                   ("stage",))
+
 
 def _is_allowed(filename: str) -> bool:
     suffix = Path(filename).suffix.lower()
     return suffix in ALLOWED_EXTENSIONS
 
 
-def _save_upload(file_storage) -> str:
+def _read_upload(file_storage) -> tuple[str, bytes, str, str]:
+    """Read an upload into memory: (content-addressed name, bytes, digest, original filename).
+
+    The stored name is the hash; the sanitized original filename is kept for the
+    analysis, whose equipment hints come from it.
+    """
     filename = secure_filename(file_storage.filename or "")
     if not filename:
         raise ValueError("Missing filename.")
     if not _is_allowed(filename):
         raise ValueError("Unsupported file type.")
 
-    suffix = Path(filename).suffix.lower()
-    stem = Path(filename).stem
-    unique_name = f"{stem}_{uuid.uuid4().hex}{suffix}"
-    target = UPLOAD_DIR / unique_name
-    file_storage.save(target)
-    return unique_name
+    # Hash while reading the request stream, so no second pass over the bytes is needed
+    hasher = bytes_hasher()
+    buffer = io.BytesIO()
+    for chunk in iter(lambda: file_storage.stream.read(UPLOAD_CHUNK_SIZE), b""):
+        hasher.update(chunk)
+        buffer.write(chunk)
+    digest = hasher.hexdigest()
+
+    # Re-uploads of the same file map to the same name, so they never add a new copy
+    return f"{digest}{Path(filename).suffix.lower()}", buffer.getvalue(), digest, filename
+
+
+def _write_upload(target: Path, data: bytes):
+    if target.exists():
+        return
+    target.parent.mkdir(parents=True, exist_ok=True)
+    partial = target.with_name(f".{target.name}.{uuid.uuid4().hex}.part")
+    partial.write_bytes(data)
+    os.replace(partial, target)
+
+
+def _retain_upload(name: str, data: bytes):
+    """Write an upload to UPLOAD_DIR on the background writer thread."""
+    global upload_writer
+    if (UPLOAD_DIR / name).exists():
+        return
+    with upload_writer_lock:
+        if name in pending_uploads:
+            return
+        if upload_writer is None:
+            upload_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="upload-writer")
+        write = pending_uploads[name] = upload_writer.submit(_write_upload, UPLOAD_DIR / name, data)
+
+    def done(future: Future):
+        pending_uploads.pop(name, None)
+        if future.exception() is not None:
+            print(f"[WARN] Could not retain upload {name}: {future.exception()}", file=sys.stderr)
+
+    write.add_done_callback(done)
+
+
+def _input_from_form() -> tuple[str, str, bytes, str, bool, str]:
+    """Read the posted dataset file or upload into memory.
+
+    Returns (stored name, image path, bytes, digest, is upload, image name).
+    Nothing is written: an upload's path is where its retained copy is (or will
+    be) stored, under its content hash; image name is its original filename.
+    """
+    dataset_file = (request.form.get("dataset_file") or "").strip()
+    if dataset_file:
+        if dataset_file not in _dataset_images():
+            raise ValueError("Unknown dataset image.")
+        image_path = DATASET_DIR / dataset_file
+        image_data = image_path.read_bytes()
+        return dataset_file, str(image_path), image_data, bytes_digest(image_data), False, dataset_file
+    file = request.files.get("image")
+    if not file:
+        raise ValueError("Please choose an image to upload.")
+    uploaded_name, image_data, digest, image_name = _read_upload(file)
+    return uploaded_name, str(UPLOAD_DIR / uploaded_name), image_data, digest, True, image_name
 
 
 def _dataset_images() -> list[str]:
@@ -168,11 +269,185 @@ def _manual_calculation(form) -> dict:
     raise ValueError("Please choose a valid shape.")
 
 
-def _get_analyzer() -> IndustrialToolAnalyzer:
-    global analyzer
-    if analyzer is None:
-        analyzer = IndustrialToolAnalyzer()
-    return analyzer
+def _get_analyzer(backend: str | None = None) -> IndustrialToolAnalyzer:
+    backend = backend or OCR_BACKEND
+    if backend not in available_backends():
+        raise ValueError(f"Unknown OCR backend: {backend}")
+    with analyzers_lock:
+        if backend not in analyzers:
+            # The model loads in the background; only OCR calls wait for it
+            analyzer = IndustrialToolAnalyzer(lazy_ocr=True, backend=backend, labeled_by_digest=True)
+            analyzer.ocr_detector.warm_up()
+            analyzers[backend] = analyzer
+        return analyzers[backend]
+
+
+def _web_backends() -> list[str]:
+    return [b for b in WEB_OCR_BACKENDS if b in available_backends()]
+
+
+def _web_backend(backend: str) -> str:
+    """Check a backend posted by a visitor against WEB_OCR_BACKENDS."""
+    if backend not in _web_backends():
+        raise ValueError(f"Unknown OCR backend: {backend}")
+    return backend
+
+
+def _results_cache() -> ResultCache:
+    global results_cache
+    with results_cache_lock:
+        if results_cache is None:
+            results_cache = ResultCache(
+                max_entries=RESULT_CACHE_ENTRIES,
+                max_bytes=RESULT_CACHE_MAX_MB * 1024 * 1024,
+                ttl=RESULT_CACHE_TTL_SECONDS,
+                disk_path=str(BASE_DIR / RESULT_CACHE_PATH),
+                disk_max_bytes=RESULT_CACHE_DISK_MAX_MB * 1024 * 1024,
+            )
+        return results_cache
+
+
+@functools.lru_cache(maxsize=None)
+def _pipeline_key(backend: str) -> str:
+    return pipeline_fingerprint(backend)
+
+
+def _result_key(backend: str, digest: str, image_name: str) -> str:
+    # Everything a result depends on: the bytes, the equipment hints in the file
+    # name, the OCR engine config and the pipeline version (the cache file outlives deploys)
+    hints = ",".join(smart_calculator.name_hints(image_name))
+    return f"{digest}:{hints}:{_get_analyzer(backend).ocr_detector.fingerprint}|{_pipeline_key(backend)}"
+
+
+def _cached_result(backend: str, digest: str, image_path: str, image_name: str) -> dict | None:
+    result = _results_cache().get(_result_key(backend, digest, image_name))
+    if result is None:
+        return None
+    analyses.inc("cached")
+    # The entry may come from an identical file stored under another path or name
+    return dict(result, image_path=image_path, image_name=image_name)
+
+
+def _publish_labeled(result: dict):
+    """Record the labeled image's content hash (its file name), so it can be served as immutable."""
+    viz_path = result.get("visualization_path")
+    if viz_path:
+        result["labeled_digest"] = Path(viz_path).stem
+
+
+def _analyze(backend: str, image_path: str, image_data: bytes | None = None, digest: str | None = None,
+             image_name: str | None = None, check_cache: bool = True) -> dict | None:
+    """Run the pipeline, or return the cached result for an identical image, name hints and pipeline config.
+
+    image_name is the image's original filename (default: the file name of
+    image_path). check_cache=False skips the lookup for callers that just made it.
+    """
+    if image_data is None:
+        image_data = Path(image_path).read_bytes()
+    digest = digest or bytes_digest(image_data)
+    image_name = image_name or os.path.basename(image_path)
+    if check_cache:
+        result = _cached_result(backend, digest, image_path, image_name)
+        if result is not None:
+            return result
+    # Uploaded bytes are decoded in memory instead of re-reading the saved file
+    result = _get_analyzer(backend).process_image(image_path, image=image_data, image_name=image_name)
+    if result is None:
+        analyses.inc("failed")
+        return None
+    analyses.inc("processed")
+    for stage, ms in result["timings"]["stages_ms"].items():
+        if stage in PIPELINE_STAGES:
+            stage_seconds.observe(ms / 1000, stage)
+    _publish_labeled(result)
+    _results_cache().put(_result_key(backend, digest, image_name), result)
+    return result
+
+
+def _run_job(job: dict) -> dict | None:
+    try:
+        # submit_job already looked the result up, so a second lookup would only add a miss
+        return _analyze(job["backend"], job["image_path"], image_name=job["name"], check_cache=False)
+    finally:
+        # Spooled inputs exist only for their job; retained uploads stay
+        image_path = Path(job["image_path"])
+        if image_path.parent == JOB_SPOOL_DIR:
+            image_path.unlink(missing_ok=True)
+
+
+def _job_queue() -> JobQueue | None:
+    """The job queue with its workers started, or None when JOB_WORKERS is 0."""
+    global job_queue
+    if JOB_WORKERS <= 0:
+        return None
+    with job_queue_lock:
+        if job_queue is None:
+            job_queue = JobQueue(str(BASE_DIR / JOBS_DB_PATH), _run_job, workers=JOB_WORKERS,
+                                 stale_after=JOB_STALE_SECONDS)
+            job_queue.start()
+        return job_queue
+
+
+def _ocr_status() -> dict:
+    # No lock: status must not wait for an analyzer that is still being built
+    backends = {name: a.ocr_detector.status() for name, a in list(analyzers.items())}
+    default = backends.get(OCR_BACKEND)
+    return {
+        "ready": bool(default and default["ready"]),
+        "default_backend": OCR_BACKEND,
+        "backends": backends,
+    }
+
+
+def _result_cache_lookups():
+    cache = results_cache
+    if cache is None:
+        return None
+    stats = cache.stats()
+    return {("hit",): stats["hits"], ("miss",): stats["misses"]}
+
+
+def _ocr_cache_lookups():
+    lookups = {}
+    for name, analyzer in list(analyzers.items()):
+        cache = analyzer.ocr_detector.cache
+        if cache is not None:
+            stats = cache.stats()
+            lookups[(name, "hit")] = stats["hits"]
+            lookups[(name, "miss")] = stats["misses"]
+    return lookups
+
+
+registry.gauge("job_queue_depth", "Background jobs waiting for a worker",
+               lambda: job_queue.depth() if job_queue else None)
+registry.gauge("result_cache_lookups_total", "Result cache lookups", _result_cache_lookups, ("result",),
+               kind="counter")
+registry.gauge("result_cache_hit_ratio", "Share of result cache lookups that hit",
+               lambda: results_cache.stats()["hit_ratio"] if results_cache else None)
+registry.gauge("ocr_cache_lookups_total", "OCR detection cache lookups", _ocr_cache_lookups,
+               ("backend", "result"), kind="counter")
+registry.gauge("ocr_model_load_seconds", "OCR model load and warm-up time",
+               lambda: {(name,): a.ocr_detector.warmup_seconds for name, a in list(analyzers.items())},
+               ("backend",))
+registry.gauge("ocr_model_ready", "Whether the OCR model is loaded and warmed (1) or not (0)",
+               lambda: {(name,): int(a.ocr_detector.ready) for name, a in list(analyzers.items())},
+               ("backend",))
+registry.gauge("process_resident_memory_bytes", "Resident set size of this worker", rss_bytes)
+
+
+@app.before_request
+def _start_request_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def _record_request(response):
+    endpoint = request.endpoint or "unmatched"
+    http_requests.inc(endpoint, request.method, response.status_code)
+    start = g.get("request_start")
+    if start is not None:
+        http_seconds.observe(time.perf_counter() - start, endpoint)
+    return response
 
 
 @app.route("/", methods=["GET", "POST"])
@@ -181,31 +456,44 @@ def index():
     result = None
     uploaded_name = None
     dataset_files = _dataset_images()
+    backend = (request.form.get("backend") or OCR_BACKEND).strip()
 
     if request.method == "POST":
-        dataset_file = (request.form.get("dataset_file") or "").strip()
-        file = request.files.get("image")
         try:
-            if dataset_file:
-                uploaded_name = dataset_file
-                image_path = str(DATASET_DIR / dataset_file)
-            else:
-                if not file:
-                    raise ValueError("Please choose an image to upload.")
-                uploaded_name = _save_upload(file)
-                image_path = str(UPLOAD_DIR / uploaded_name)
-
-            result = _get_analyzer().process_image(image_path)
+            _web_backend(backend)
+            uploaded_name, image_path, image_data, digest, uploaded, image_name = _input_from_form()
+            if uploaded:
+                if RETAIN_UPLOADS:
+                    _retain_upload(uploaded_name, image_data)
+                else:
+                    uploaded_name = None  # Nothing on disk to show
+            # The pipeline decodes the bytes in memory; it never reads the upload back
+            result = _analyze(backend, image_path, image_data, digest, image_name)
             if result is None:
                 error = "Processing failed. Check the server logs for details."
-            else:
-                results_cache[uploaded_name] = result
         except Exception as exc:
             # Safely encode error message for Windows console
             try:
                 error = str(exc)
             except UnicodeEncodeError:
                 error = str(exc).encode('utf-8', errors='replace').decode('utf-8', errors='replace')
+    elif request.args.get("job"):
+        # Page the browser is sent to once a background job has finished
+        queue = _job_queue()
+        job = queue.get(request.args["job"]) if queue else None
+        if job is None:
+            error = "Unknown job."
+        else:
+            # Retained uploads are shown from UPLOAD_DIR, under their stored name
+            image_path = Path(job["image_path"])
+            uploaded_name = image_path.name if RETAIN_UPLOADS and image_path.parent == UPLOAD_DIR else None
+            backend = job["backend"] or backend
+            if job["status"] == "done":
+                result = job["result"]
+            elif job["status"] == "failed":
+                error = job["error"]
+            else:
+                error = "The job is still running; reload this page in a moment."
 
     return render_template_string(
         """
@@ -254,27 +542,46 @@ def index():
               <div class="sidebar">
                 <div class="card">
                   <h3>Upload Image</h3>
-                  <form method="post" enctype="multipart/form-data" class="stack">
+                  <form method="post" enctype="multipart/form-data" class="stack" data-job-form>
                     <input type="file" name="image" accept="image/*" required>
+                    {% if backends|length > 1 %}
+                    <select name="backend">
+                      {% for b in backends %}
+                        <option value="{{ b }}" {% if b == backend %}selected{% endif %}>OCR engine: {{ b }}</option>
+                      {% endfor %}
+                    </select>
+                    {% endif %}
                     <button class="btn" type="submit">Run OCR</button>
-                    <span class="muted">Use clear images with visible dimensions.</span>
+                    <span class="muted job-status">Use clear images with visible dimensions.</span>
                   </form>
                 </div>
 
                 {% if dataset_files %}
                 <div class="card">
                   <h3>Dataset Image</h3>
-                  <form method="post" class="stack">
+                  <form method="post" class="stack" data-job-form>
                     <select name="dataset_file" required>
                       {% for f in dataset_files %}
                         <option value="{{ f }}">{{ f }}</option>
                       {% endfor %}
                     </select>
+                    {% if backends|length > 1 %}
+                    <select name="backend">
+                      {% for b in backends %}
+                        <option value="{{ b }}" {% if b == backend %}selected{% endif %}>OCR engine: {{ b }}</option>
+                      {% endfor %}
+                    </select>
+                    {% endif %}
                     <button class="btn" type="submit">Run OCR</button>
+                    <span class="muted job-status"></span>
                   </form>
                 </div>
                 {% endif %}
 
+                {% if not ocr_status.ready %}
+                  <p class="muted">OCR model is still loading; the first run waits for it. The manual calculator works right away.</p>
+                {% endif %}
+
                 {% if error %}
                   <div class="card error">Error: {{ error }}</div>
                 {% endif %}
@@ -291,7 +598,11 @@ def index():
                 {% if result %}
                   <div class="card">
                     <h3>Labeled Output</h3>
+                    {% if result.get('labeled_digest') %}
+                    <img src="{{ url_for('labeled', digest=result['labeled_digest']) }}" alt="labeled">
+                    {% else %}
                     <img src="{{ url_for('files', dir_key='output', filename=output_name) }}" alt="labeled">
+                    {% endif %}
                   </div>
 
                   <div class="card">
@@ -342,6 +653,63 @@ def index():
                 {% endif %}
               </div>
             </div>
+            <script>
+              // Run OCR as a background job and poll for it, so the page does not wait on one long request
+              document.querySelectorAll('form[data-job-form]').forEach(function (form) {
+                form.addEventListener('submit', async function (event) {
+                  event.preventDefault();
+                  const status = form.querySelector('.job-status');
+                  const button = form.querySelector('button[type="submit"]');
+                  const show = function (text) {
+                    if (status) status.textContent = text;
+                  };
+                  const fail = function (text) {
+                    show(text);
+                    button.disabled = false;
+                  };
+                  button.disabled = true;
+                  show('Uploading...');
+                  let job;
+                  try {
+                    const response = await fetch("{{ url_for('submit_job') }}", {method: 'POST', body: new FormData(form)});
+                    if (response.status === 503) {
+                      form.submit();
+                      return;
+                    }
+                    job = await response.json();
+                    if (!response.ok) {
+                      fail(job.error);
+                      return;
+                    }
+                  } catch (err) {
+                    fail('Could not reach the server, please try again.');
+                    return;
+                  }
+                  if (job.page_url) {
+                    window.location = job.page_url;
+                    return;
+                  }
+                  const poll = async function () {
+                    let state;
+                    try {
+                      state = await (await fetch(job.status_url)).json();
+                    } catch (err) {
+                      fail('Lost contact with the server, please try again.');
+                      return;
+                    }
+                    if (state.page_url) {
+                      window.location = state.page_url;
+                      return;
+                    }
+                    show(state.status === 'queued'
+                      ? 'Queued (' + state.queue_depth + ' waiting)...'
+                      : 'Running OCR...');
+                    setTimeout(poll, 1000);
+                  };
+                  poll();
+                });
+              });
+            </script>
           </body>
         </html>
         """,
@@ -349,6 +717,9 @@ def index():
         result=result,
         uploaded_name=uploaded_name,
         dataset_files=dataset_files,
+        backends=_web_backends(),
+        backend=backend,
+        ocr_status=_ocr_status(),
         output_name=Path(result["visualization_path"]).name if result and result.get("visualization_path") else "",
     )
 
@@ -516,10 +887,103 @@ def manual_calculator():
     )
 
 
+@app.route("/api/jobs", methods=["POST"])
+def submit_job():
+    queue = _job_queue()
+    if queue is None:
+        return jsonify({"error": "Background processing is disabled (JOB_WORKERS=0)."}), 503
+    backend = (request.form.get("backend") or OCR_BACKEND).strip()
+    try:
+        _web_backend(backend)
+        stored_name, image_path, image_data, digest, uploaded, name = _input_from_form()
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    # A file analyzed before is answered at once, without queueing any work
+    cached = _cached_result(backend, digest, image_path, name)
+    if uploaded and RETAIN_UPLOADS:
+        if cached is None:
+            # Workers read the image from disk (possibly after a restart), so it is written now
+            _write_upload(Path(image_path), image_data)
+        else:
+            _retain_upload(stored_name, image_data)
+    elif uploaded:
+        if cached is None:
+            image_path = str(JOB_SPOOL_DIR / f"{uuid.uuid4().hex}{Path(image_path).suffix}")
+            _write_upload(Path(image_path), image_data)
+    job_id = queue.submit(image_path, name, backend, result=cached)
+    if cached is not None:
+        return jsonify({
+            "id": job_id,
+            "status": "done",
+            "status_url": url_for("job_status", job_id=job_id),
+            "page_url": url_for("index", job=job_id),
+        }), 200
+    return jsonify({
+        "id": job_id,
+        "status": "queued",
+        "status_url": url_for("job_status", job_id=job_id),
+    }), 202
+
+
+@app.route("/api/jobs/<job_id>")
+def job_status(job_id: str):
+    queue = _job_queue()
+    job = queue.get(job_id) if queue else None
+    if job is None:
+        abort(404)
+    payload = {key: job[key] for key in ("id", "status", "name", "backend", "error", "result",
+                                         "created", "started", "finished")}
+    if job["status"] == "queued":
+        payload["queue_depth"] = queue.depth()
+    if job["status"] in ("done", "failed"):
+        payload["page_url"] = url_for("index", job=job_id)
+    return jsonify(payload)
+
+
+@app.route("/api/status")
+def status():
+    cache = results_cache
+    return jsonify(dict(_ocr_status(), result_cache=cache.stats() if cache else None))
+
+
+@app.route("/metrics")
+def metrics():
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/healthz")
+def healthz():
+    # Liveness: the process serves requests, even while the model is still loading
+    return jsonify({"status": "ok"})
+
+
+@app.route("/readyz")
+def readyz():
+    # Readiness: the default OCR model is loaded and warmed (with OCR_WARMUP=0 it
+    # loads on first use, so there is nothing to wait for)
+    ocr_status = _ocr_status()
+    return jsonify(ocr_status), 200 if ocr_status["ready"] or not OCR_WARMUP else 503
+
+
+@app.route("/labeled/<digest>.jpg")
+def labeled(digest: str):
+    if not re.fullmatch(r"[0-9a-f]{40}", digest):
+        abort(404)
+    # The name is the content hash: the URL changes whenever the image would
+    response = send_from_directory(OUTPUT_DIR_PATH, f"{digest}.jpg", etag=digest, max_age=IMMUTABLE_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
 @app.route("/files/<dir_key>/<path:filename>")
 def files(dir_key: str, filename: str):
     if dir_key == "input":
         base = UPLOAD_DIR
+        # A retained upload may still be on its way to disk
+        write = pending_uploads.get(filename)
+        if write is not None:
+            wait_futures([write], timeout=30)
     elif dir_key == "output":
         base = OUTPUT_DIR_PATH
     else:
@@ -527,6 +991,33 @@ def files(dir_key: str, filename: str):
     return send_from_directory(base, filename)
 
 
+def _startup():
+    # Resume jobs left pending by an earlier run, then load the default OCR model
+    _job_queue()
+    if OCR_WARMUP:
+        _get_analyzer()
+
+
+def start_background():
+    """Start the job workers and model loading without blocking the caller."""
+    if OCR_WARMUP or JOB_WORKERS > 0:
+        threading.Thread(target=_startup, name="server-startup", daemon=True).start()
+
+
+def preload() -> IndustrialToolAnalyzer:
+    """Load and warm the default OCR model in this process (the gunicorn master, before fork)."""
+    analyzer = _get_analyzer()
+    analyzer.ocr_detector.wait_ready()
+    return analyzer
+
+
+# Start background work as soon as the process starts, without holding up the
+# import of this module. Threads do not survive fork, so a preloading gunicorn
+# master leaves this to its workers (gunicorn.conf.py).
+if not SERVER_PRELOAD:
+    start_background()
+
+
 def main():
     import os
     parser = argparse.ArgumentParser(description="Local OCR measurement server")
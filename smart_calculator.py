@@ -5,9 +5,25 @@ import math
 from typing import Dict, List, Optional
 
 class SmartCalculator:
+    # Filename keywords that steer identify_equipment_type
+    NAME_HINTS = {
+        'scoop': ('scoop',),
+        'bucket': ('bucket', '통', '바스켓'),
+        'hopper': ('hopper', '호퍼'),
+        'tank': ('tank', '탱크', 'container'),
+        'mixer': ('mixer', '혼합'),
+    }
+    
     def __init__(self):
         pass
     
+    def name_hints(self, image_name: str = "") -> List[str]:
+        """
+        Equipment types named in the filename; the only part of the name that affects results
+        """
+        name_lower = image_name.lower()
+        return [kind for kind, words in self.NAME_HINTS.items() if any(word in name_lower for word in words)]
+    
     def identify_equipment_type(self, dimensions: List[Dict], image_name: str = "") -> str:
         """
         Smart identification of equipment type based on dimensions and filename
@@ -16,27 +32,27 @@ class SmartCalculator:
         num_dims = len(dimensions)
         
         # Check filename for hints
-        name_lower = image_name.lower()
+        hints = self.name_hints(image_name)
         
         # Scoop detection
-        if 'scoop' in name_lower or num_dims == 3:
+        if 'scoop' in hints or num_dims == 3:
             if num_dims >= 3:
                 # Top, bottom, height
                 return 'scoop'
         
         # Bucket detection
-        if 'bucket' in name_lower or '통' in name_lower or '바스켓' in name_lower:
+        if 'bucket' in hints:
             if num_dims >= 3:
                 return 'bucket'
         
         # Hopper detection
-        if 'hopper' in name_lower or '호퍼' in name_lower:
+        if 'hopper' in hints:
             if num_dims >= 4:
                 return 'hopper'
             return 'frustum'
         
         # Tank/Container detection
-        if 'tank' in name_lower or '탱크' in name_lower or 'container' in name_lower:
+        if 'tank' in hints:
             if num_dims == 2:
                 return 'cylinder'
             elif num_dims == 3:
@@ -46,7 +62,7 @@ class SmartCalculator:
                 return 'rectangular'
         
         # Mixer detection
-        if 'mixer' in name_lower or '혼합' in name_lower:
+        if 'mixer' in hints:
             if num_dims >= 3:
                 return 'frustum'
         
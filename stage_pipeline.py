@@ -0,0 +1,241 @@
+"""
+Overlapped stage pipeline for directory runs
+    decode + preprocess  (threads)
+ -> OCR + parse          (worker processes, or one in-process thread)
+ -> calculate + render   (threads)
+Stages are joined by bounded queues, so a slow stage applies backpressure
+upstream and memory stays bounded. Throughput is then limited by the slowest
+stage instead of the sum of all of them.
+"""
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from timing import StageTimer
+
+_DONE = object()
+
+# Analyzer owned by the current OCR worker process
+_worker_analyzer = None
+
+
+def _init_ocr_worker(backend: Optional[str] = None):
+    global _worker_analyzer
+    from main import IndustrialToolAnalyzer
+    _worker_analyzer = IndustrialToolAnalyzer(backend=backend)
+
+
+def _new_pool(workers: int, backend: Optional[str] = None) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_ocr_worker, initargs=(backend,))
+
+
+def _detect(analyzer, imgs: list, image_paths: list, grays: list, batched: bool) -> List[Optional[Dict]]:
+    if batched:
+        return analyzer.detect_batch(imgs, image_paths, grays)
+    return [analyzer.detect(img, image_path, gray) for img, image_path, gray in zip(imgs, image_paths, grays)]
+
+
+def _detect_in_worker(imgs: list, image_paths: list, grays: list,
+                      batched: bool) -> Tuple[List[Optional[Dict]], list]:
+    timer = StageTimer()
+    with timer.activate():
+        detections = _detect(_worker_analyzer, imgs, image_paths, grays, batched)
+    return detections, timer.spans
+
+
+def _run_stage(func, in_q: queue.Queue, out_q: queue.Queue, workers: int,
+               batch_size: Optional[int] = None) -> threading.Thread:
+    """
+    Run `func` over items of in_q on `workers` threads, forwarding results to out_q
+    A single _DONE marker stops every worker; out_q gets _DONE once all have stopped.
+    With batch_size, func takes a list of up to batch_size items and returns a
+    list of results. A batch is what is already waiting in in_q: it never waits
+    to fill up, so batches only grow when this stage is the bottleneck.
+    """
+    def worker():
+        while True:
+            item = in_q.get()
+            if item is _DONE:
+                in_q.put(_DONE)
+                return
+            if batch_size is None:
+                out_q.put(func(item))
+                continue
+            items = [item]
+            while len(items) < batch_size:
+                try:
+                    item = in_q.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _DONE:
+                    in_q.put(_DONE)
+                    break
+                items.append(item)
+            for result in func(items):
+                out_q.put(result)
+
+    def supervisor():
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(workers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        out_q.put(_DONE)
+
+    thread = threading.Thread(target=supervisor, daemon=True)
+    thread.start()
+    return thread
+
+
+def iter_pipeline(tasks: Iterable[Tuple[str, str]], ocr_workers: int = 1, decode_workers: int = 2,
+                  write_workers: int = 2, queue_size: int = 8,
+                  backend: Optional[str] = None, ocr_batch: int = 1) -> Iterator[Tuple[str, Optional[Dict]]]:
+    """
+    Process (image_path, output_name) tasks through the staged pipeline
+    Yields (image_path, result) in task order; result is None for failed images.
+    ocr_workers=0 runs OCR on a single thread of this process instead of worker processes.
+    backend selects the OCR backend (default: config OCR_BACKEND).
+    With ocr_batch > 1, up to that many decoded images waiting for OCR go to one
+    OCR call, with text recognition batched across them (detect_batch).
+
+    If an OCR worker process dies, the pool is restarted and each image that was
+    in flight is retried alone in a fresh process, so only an image that crashes
+    a worker by itself is reported as failed. An exception raised by `tasks` is
+    re-raised once the images already queued have been yielded.
+    """
+    from main import IndustrialToolAnalyzer
+
+    # The model is only loaded here when OCR runs in-process
+    analyzer = IndustrialToolAnalyzer(lazy_ocr=True, backend=backend)
+    pool = None
+    pool_lock = threading.Lock()
+    if ocr_workers > 0:
+        pool = _new_pool(ocr_workers, backend)
+    feed_errors = []
+
+    batched = ocr_batch > 1
+    decode_q = queue.Queue(maxsize=queue_size)
+    ocr_q = queue.Queue(maxsize=max(queue_size, ocr_batch))
+    render_q = queue.Queue(maxsize=queue_size)
+    result_q = queue.Queue(maxsize=queue_size)
+
+    # Only text proposals read the grayscale image; otherwise it is not sent to the OCR processes
+    send_gray = analyzer.ocr_detector.text_proposals
+
+    # Each item carries its StageTimer from stage to stage; the decode stage
+    # passes the preprocessor's grayscale image where the detection goes later
+    def decode(item):
+        index, image_path, output_name = item
+        timer = StageTimer()
+        gray = None
+        try:
+            with timer.activate():
+                img = analyzer.load(image_path)
+                if img is not None:
+                    gray = analyzer.preprocess(img, image_path, output_name)
+                    if gray is None:
+                        img = None
+        except Exception as e:
+            print(f"[ERROR] Decoding {image_path} failed: {e}")
+            img = None
+        return index, image_path, output_name, img, gray, timer
+
+    def detect_in_pool(imgs, image_paths, grays):
+        nonlocal pool
+        current = pool
+        try:
+            return current.submit(_detect_in_worker, imgs, image_paths, grays, batched).result()
+        except BrokenProcessPool:
+            with pool_lock:
+                if pool is current:
+                    print("[WARN] An OCR worker process crashed, restarting the pool")
+                    current.shutdown(wait=False, cancel_futures=True)
+                    pool = _new_pool(ocr_workers, backend)
+        detections, spans = [], []
+        for img, image_path, gray in zip(imgs, image_paths, grays):
+            print(f"[WARN] Retrying {image_path} in a separate worker process")
+            try:
+                with _new_pool(1, backend) as retry_pool:
+                    found, found_spans = retry_pool.submit(_detect_in_worker, [img], [image_path], [gray],
+                                                           batched).result()
+            except BrokenProcessPool as e:
+                print(f"[ERROR] OCR worker failed on {image_path}: {e}")
+                found, found_spans = [None], []
+            detections += found
+            spans += found_spans
+        return detections, spans
+
+    def ocr(items):
+        ready = [item for item in items if item[3] is not None]
+        detections = {}
+        if ready:
+            image_paths = [item[1] for item in ready]
+            imgs, grays = [item[3] for item in ready], [item[4] for item in ready]
+            try:
+                if pool is not None:
+                    found, spans = detect_in_pool(imgs, image_paths, grays if send_gray else [None] * len(ready))
+                else:
+                    batch_timer = StageTimer()
+                    with batch_timer.activate():
+                        found = _detect(analyzer, imgs, image_paths, grays, batched)
+                    spans = batch_timer.spans
+                detections = {item[0]: detection for item, detection in zip(ready, found)}
+                # Images OCR'd together share the spans of their OCR call
+                for item in ready:
+                    item[5].extend(spans)
+            except Exception as e:
+                print(f"[ERROR] OCR worker failed on {', '.join(image_paths)}: {e}")
+        return [(index, image_path, output_name, img, detections.get(index), timer)
+                for index, image_path, output_name, img, _, timer in items]
+
+    def render(item):
+        index, image_path, output_name, img, detection, timer = item
+        if detection is None:
+            return index, image_path, None
+        try:
+            with timer.activate():
+                result = analyzer.finish(img, image_path, output_name, detection)
+            result['timings'] = timer.as_dict()
+        except Exception as e:
+            print(f"[ERROR] Rendering {image_path} failed: {e}")
+            result = None
+        return index, image_path, result
+
+    def feed():
+        try:
+            for index, (image_path, output_name) in enumerate(tasks):
+                decode_q.put((index, image_path, output_name))
+        except Exception as e:
+            feed_errors.append(e)
+        finally:
+            # Without the marker the stages, and this generator, would wait forever
+            decode_q.put(_DONE)
+
+    threading.Thread(target=feed, daemon=True).start()
+    _run_stage(decode, decode_q, ocr_q, decode_workers)
+    # One client thread per OCR process keeps every process busy without over-queuing
+    _run_stage(ocr, ocr_q, render_q, max(ocr_workers, 1), batch_size=max(ocr_batch, 1))
+    _run_stage(render, render_q, result_q, write_workers)
+
+    # Stages finish out of order; hold results until their predecessors are done
+    next_index = 0
+    finished = {}
+    try:
+        while True:
+            item = result_q.get()
+            if item is _DONE:
+                break
+            index, image_path, result = item
+            finished[index] = (image_path, result)
+            while next_index in finished:
+                yield finished.pop(next_index)
+                next_index += 1
+        for index in sorted(finished):
+            yield finished[index]
+        if feed_errors:
+            raise feed_errors[0]
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,197 @@
+"""
+Synthetic equipment drawings with dimension labels, for benchmarks and tests
+Renders cylinders, frustums and boxes with labels such as "330mm", "58.8 cm"
+and "Ø600" at controllable label size, noise level and resolution. Every
+drawing comes with its ground truth: the text boxes that were drawn and the
+dimension values (mm) they encode. Nothing is downloaded; only OpenCV/numpy are used.
+"""
+import json
+import os
+from typing import Dict, List, Tuple
+
+import cv2
+import numpy as np
+
+SHAPES = ['cylinder', 'frustum', 'box']
+
+_FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+
+def _format_label(value_mm: float, rng: np.random.Generator, diameter: bool = False) -> Tuple[str, float]:
+    """
+    Pick a label style for a value; returns (text, value_mm the text encodes)
+    """
+    styles = ['mm', 'cm'] + (['dia'] if diameter else [])
+    style = styles[rng.integers(len(styles))]
+    if style == 'cm':
+        cm = round(value_mm / 10, 1)
+        return f"{cm:g} cm", cm * 10
+    mm = int(round(value_mm))
+    if style == 'dia':
+        return f"Ø{mm}", float(mm)
+    return f"{mm}mm", float(mm)
+
+
+def _draw_label(img, text: str, x: int, y: int, font_scale: float, thickness: int) -> List[List[float]]:
+    """
+    Draw a label with its baseline-left corner at (x, y) and return its bbox (4 points)
+    The Hershey fonts have no Ø glyph, so the diameter sign is drawn as a slashed circle.
+    """
+    body = text[1:] if text.startswith('Ø') else text
+    (tw, th), baseline = cv2.getTextSize(body, _FONT, font_scale, thickness)
+    x0 = x
+    if text.startswith('Ø'):
+        r = max(th // 2, 3)
+        cx, cy = x + r, y - th // 2
+        cv2.circle(img, (cx, cy), r, (0, 0, 0), thickness, cv2.LINE_AA)
+        cv2.line(img, (cx - r, cy + r), (cx + r, cy - r), (0, 0, 0), thickness, cv2.LINE_AA)
+        x += 2 * r + max(th // 4, 2)
+    cv2.putText(img, body, (x, y), _FONT, font_scale, (0, 0, 0), thickness, cv2.LINE_AA)
+    x1 = x + tw
+    return [[float(x0), float(y - th)], [float(x1), float(y - th)],
+            [float(x1), float(y + baseline)], [float(x0), float(y + baseline)]]
+
+
+def _dimension_line(img, p1, p2, thickness: int):
+    cv2.arrowedLine(img, p1, p2, (0, 0, 0), thickness, cv2.LINE_AA, tipLength=0.04)
+    cv2.arrowedLine(img, p2, p1, (0, 0, 0), thickness, cv2.LINE_AA, tipLength=0.04)
+
+
+def render_drawing(shape: str = 'cylinder', dims_mm: Tuple[float, ...] = None, width: int = 1200,
+                   height: int = 900, font_scale: float = 1.0, noise: float = 0.0,
+                   seed: int = 0) -> Tuple[np.ndarray, Dict]:
+    """
+    Render one drawing
+    shape: 'cylinder' (diameter, height), 'frustum' (top, bottom, height) or 'box' (length, width, height)
+    font_scale controls label size relative to the sheet; noise in [0, 1] adds
+    sensor noise and speckles. Returns (BGR image, ground truth dict).
+    """
+    rng = np.random.default_rng(seed)
+    if dims_mm is None:
+        count = 2 if shape == 'cylinder' else 3
+        dims_mm = tuple(float(v) for v in rng.integers(100, 900, size=count))
+    img = np.full((height, width, 3), 255, dtype=np.uint8)
+    unit = min(width, height) / 1400.0  # pixels per mm at the reference size
+    thick = max(1, int(round(2 * unit)))
+    text_scale = font_scale * max(unit, 0.3)
+    text_thick = max(1, int(round(2 * text_scale)))
+    cx, cy = width // 2, height // 2
+    labels = []  # (text, value_mm, position)
+
+    if shape == 'cylinder':
+        d, h = dims_mm[0] * unit, dims_mm[1] * unit
+        x0, x1 = int(cx - d / 2), int(cx + d / 2)
+        y0, y1 = int(cy - h / 2), int(cy + h / 2)
+        ry = max(int(d * 0.12), 4)
+        cv2.ellipse(img, (cx, y0), (int(d / 2), ry), 0, 0, 360, (0, 0, 0), thick, cv2.LINE_AA)
+        cv2.ellipse(img, (cx, y1), (int(d / 2), ry), 0, 0, 180, (0, 0, 0), thick, cv2.LINE_AA)
+        cv2.line(img, (x0, y0), (x0, y1), (0, 0, 0), thick, cv2.LINE_AA)
+        cv2.line(img, (x1, y0), (x1, y1), (0, 0, 0), thick, cv2.LINE_AA)
+        _dimension_line(img, (x0, y0 - ry - 25), (x1, y0 - ry - 25), thick)
+        _dimension_line(img, (x1 + 40, y0), (x1 + 40, y1), thick)
+        labels.append((*_format_label(dims_mm[0], rng, diameter=True), (x0 + int(d / 3), y0 - ry - 35)))
+        labels.append((*_format_label(dims_mm[1], rng), (x1 + 55, cy)))
+    elif shape == 'frustum':
+        top, bottom, h = dims_mm[0] * unit, dims_mm[1] * unit, dims_mm[2] * unit
+        y0, y1 = int(cy - h / 2), int(cy + h / 2)
+        pts = np.array([[cx - top / 2, y0], [cx + top / 2, y0],
+                        [cx + bottom / 2, y1], [cx - bottom / 2, y1]], dtype=np.int32)
+        cv2.polylines(img, [pts], True, (0, 0, 0), thick, cv2.LINE_AA)
+        cv2.ellipse(img, (cx, y0), (int(top / 2), max(int(top * 0.1), 4)), 0, 0, 360, (0, 0, 0), thick)
+        _dimension_line(img, (int(cx - top / 2), y0 - 40), (int(cx + top / 2), y0 - 40), thick)
+        _dimension_line(img, (int(cx - bottom / 2), y1 + 30), (int(cx + bottom / 2), y1 + 30), thick)
+        right = int(cx + max(top, bottom) / 2) + 40
+        _dimension_line(img, (right, y0), (right, y1), thick)
+        labels.append((*_format_label(dims_mm[0], rng, diameter=True), (int(cx - top / 6), y0 - 50)))
+        labels.append((*_format_label(dims_mm[1], rng, diameter=True), (int(cx - bottom / 6), y1 + 70)))
+        labels.append((*_format_label(dims_mm[2], rng), (right + 15, cy)))
+    elif shape == 'box':
+        length, depth, h = dims_mm[0] * unit, dims_mm[1] * unit * 0.5, dims_mm[2] * unit
+        x0, y1 = int(cx - length / 2 - depth / 2), int(cy + h / 2 + depth / 2)
+        x1, y0 = int(x0 + length), int(y1 - h)
+        dx, dy = int(depth), -int(depth)
+        cv2.rectangle(img, (x0, y0), (x1, y1), (0, 0, 0), thick)
+        for px, py in [(x0, y0), (x1, y0), (x1, y1)]:
+            cv2.line(img, (px, py), (px + dx, py + dy), (0, 0, 0), thick, cv2.LINE_AA)
+        cv2.line(img, (x0 + dx, y0 + dy), (x1 + dx, y0 + dy), (0, 0, 0), thick, cv2.LINE_AA)
+        cv2.line(img, (x1 + dx, y0 + dy), (x1 + dx, y1 + dy), (0, 0, 0), thick, cv2.LINE_AA)
+        _dimension_line(img, (x0, y1 + 30), (x1, y1 + 30), thick)
+        _dimension_line(img, (x0 - 30, y0), (x0 - 30, y1), thick)
+        labels.append((*_format_label(dims_mm[0], rng), (x0 + int(length / 3), y1 + 70)))
+        labels.append((*_format_label(dims_mm[1], rng), (x1 + dx // 2 + 20, y1 + dy // 2)))
+        labels.append((*_format_label(dims_mm[2], rng), (max(x0 - 200, 5), int(cy))))
+    else:
+        raise ValueError(f"Unknown shape: {shape}")
+
+    detections = []
+    for text, value_mm, (x, y) in labels:
+        bbox = _draw_label(img, text, int(x), int(y), text_scale, text_thick)
+        detections.append({'text': text, 'confidence': 0.99, 'bbox': bbox, 'value_mm': value_mm})
+
+    if noise > 0:
+        sigma = 40.0 * noise
+        noisy = img.astype(np.float32) + rng.normal(0, sigma, img.shape)
+        speckles = rng.random(img.shape[:2]) < 0.01 * noise
+        noisy[speckles] = 0
+        img = np.clip(noisy, 0, 255).astype(np.uint8)
+
+    truth = {
+        'shape': shape,
+        'dimensions_mm': [d['value_mm'] for d in detections],
+        'detections': [{k: d[k] for k in ('text', 'confidence', 'bbox')} for d in detections],
+        'size': [width, height],
+        'font_scale': font_scale,
+        'noise': noise,
+        'seed': seed,
+    }
+    return img, truth
+
+
+def generate_set(count: int = 20, width: int = 1200, height: int = 900, font_scale: float = 1.0,
+                 noise: float = 0.0, seed: int = 0) -> List[Tuple[str, np.ndarray, Dict]]:
+    """
+    A reproducible mix of shapes: [(name, image, truth), ...]
+    """
+    drawings = []
+    for i in range(count):
+        shape = SHAPES[i % len(SHAPES)]
+        img, truth = render_drawing(shape, width=width, height=height, font_scale=font_scale,
+                                    noise=noise, seed=seed + i)
+        drawings.append((f"synthetic_{shape}_{i:04d}", img, truth))
+    return drawings
+
+
+def write_set(output_dir: str, drawings: List[Tuple[str, np.ndarray, Dict]]) -> List[str]:
+    """
+    Save drawings as PNG plus a `<name>.ocr.json` ground-truth sidecar each
+    Sidecars carry the image's content digest, so FakeOCRBackend can answer for
+    copies of the drawing under any name (e.g. uploads).
+    """
+    from content_cache import image_digest
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for name, img, truth in drawings:
+        path = os.path.join(output_dir, f"{name}.png")
+        cv2.imwrite(path, img)
+        truth = dict(truth, image_digest=image_digest(img))
+        with open(os.path.join(output_dir, f"{name}.ocr.json"), 'w', encoding='utf-8') as f:
+            json.dump(truth, f, indent=2, ensure_ascii=False)
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='Generate synthetic dimension drawings')
+    parser.add_argument('--out', type=str, default='synthetic_images', help='Output directory')
+    parser.add_argument('--count', type=int, default=20)
+    parser.add_argument('--width', type=int, default=1200)
+    parser.add_argument('--height', type=int, default=900)
+    parser.add_argument('--font-scale', type=float, default=1.0, help='Label size multiplier')
+    parser.add_argument('--noise', type=float, default=0.0, help='Noise level 0..1')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    drawings = generate_set(args.count, args.width, args.height, args.font_scale, args.noise, args.seed)
+    paths = write_set(args.out, drawings)
+    print(f"✓ Wrote {len(paths)} drawing(s) with ground truth to: {args.out}")
@@ -0,0 +1,121 @@
+"""Concurrency stress test for the web server's OCR path (fake backend, no model download)
+
+Renders synthetic drawings with ground truth, analyzes each once sequentially,
+then fires the same uploads at the Flask app from many threads at once, half
+through the synchronous form post and half through the background job API.
+Every concurrent result must match its sequential one. The fake backend raises
+when one engine instance is used by two threads at once, so unsafe sharing
+fails the run. The drawings and the job queue live in a temporary directory,
+and files the uploads create are removed afterwards.
+Exit code 1 on any mismatch or error.
+
+    python test_concurrency.py
+    python test_concurrency.py --uploads 64 --threads 16 --engines 2
+"""
+import argparse
+import html
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Concurrent upload stress test (fake OCR backend)')
+    parser.add_argument('--uploads', type=int, default=16, help='Concurrent uploads to fire')
+    parser.add_argument('--threads', type=int, default=8, help='Client threads')
+    parser.add_argument('--engines', type=int, default=2, help='OCR engine instances (OCR_TILE_WORKERS)')
+    parser.add_argument('--job-workers', type=int, default=4, help='Background job workers (JOB_WORKERS)')
+    parser.add_argument('--latency-ms', type=float, default=20.0, help='Simulated inference time')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='stress_') as work_dir:
+        return stress(args, work_dir)
+
+
+def stress(args, work_dir: str) -> int:
+    drawings_dir = os.path.join(work_dir, 'drawings')
+    os.environ.update(OCR_BACKEND='fake', FAKE_OCR_DIR=drawings_dir, FAKE_OCR_LATENCY_MS=str(args.latency_ms),
+                      OCR_TILE_WORKERS=str(args.engines), JOB_WORKERS=str(args.job_workers),
+                      OCR_CACHE='0', OCR_WARMUP='0', JOBS_DB_PATH=os.path.join(work_dir, 'jobs.sqlite3'))
+    import cv2
+    import server
+    from config import PROCESSED_DIR
+    from content_cache import ResultCache
+    from synthetic_drawings import generate_set, write_set
+
+    # Distinct drawings and no result cache, so every upload really runs OCR
+    drawings = generate_set(args.uploads, width=640, height=480, seed=int(time.time()))
+    paths = write_set(drawings_dir, drawings)
+    server.results_cache = ResultCache(max_entries=0)
+    pngs = [cv2.imencode('.png', img)[1].tobytes() for _, img, _ in drawings]
+
+    def texts(result):
+        return [d['text'] for d in result['dimensions_extracted']]
+
+    directories = [server.UPLOAD_DIR, server.OUTPUT_DIR_PATH, server.BASE_DIR / PROCESSED_DIR]
+    before = {d: set(os.listdir(d)) if d.exists() else set() for d in directories}
+    print(f"Analyzing {len(paths)} drawing(s) sequentially...")
+    analyzer = server._get_analyzer('fake')
+    expected = [texts(analyzer.process_image(path, image=data)) for path, data in zip(paths, pngs)]
+
+    local = threading.local()
+
+    def upload(index):
+        if not hasattr(local, 'client'):
+            local.client = server.app.test_client()
+        client = local.client
+        data = {'backend': 'fake', 'image': (io.BytesIO(pngs[index]), f'stress_{index:04d}.png')}
+        if index % 2:
+            # Synchronous form post: OCR runs on this request thread
+            response = client.post('/', data=data, content_type='multipart/form-data')
+            page = html.unescape(response.get_data(as_text=True))
+            if response.status_code != 200 or 'class="card error"' in page:
+                return f'form post failed ({response.status_code})'
+            missing = [text for text in expected[index] if f'<td>{text}</td>' not in page]
+            return f'form post is missing {missing}' if missing else None
+
+        response = client.post('/api/jobs', data=data, content_type='multipart/form-data')
+        if response.status_code != 202:
+            return f'job submit returned {response.status_code}: {response.get_json()}'
+        status_url = response.get_json()['status_url']
+        job = client.get(status_url).get_json()
+        while job['status'] not in ('done', 'failed'):
+            time.sleep(0.02)
+            job = client.get(status_url).get_json()
+        if job['status'] == 'failed':
+            return f"job failed: {job['error']}"
+        found = texts(job['result'])
+        return None if found == expected[index] else f'expected {expected[index]}, got {found}'
+
+    print(f"Firing {args.uploads} upload(s) from {args.threads} thread(s) "
+          f"({args.engines} engine instance(s), {args.job_workers} job worker(s))...")
+    start = time.perf_counter()
+    errors = []
+    try:
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            for (name, _, _), error in zip(drawings, pool.map(upload, range(len(drawings)))):
+                if error:
+                    errors.append(f"{name}: {error}")
+    finally:
+        if server.job_queue is not None:
+            server.job_queue.stop()
+        for d in directories:
+            for name in set(os.listdir(d)) - before[d] if d.exists() else ():
+                os.remove(d / name)
+    elapsed = time.perf_counter() - start
+
+    if errors:
+        for error in errors:
+            print(f"[FAIL] {error}")
+        print(f"[ERROR] {len(errors)} of {args.uploads} upload(s) failed")
+        return 1
+    print(f"[OK] {args.uploads} concurrent upload(s) matched the sequential results in {elapsed:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
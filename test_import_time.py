@@ -0,0 +1,76 @@
+"""Import-time budget check: entry points must not load cv2/numpy/OCR engines on import
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter and an
+empty working directory for each entry point, then checks the total import
+time against a budget, that no heavy module was imported, and that importing
+created no directories. Exit code 1 on any violation.
+
+    python test_import_time.py
+    IMPORT_BUDGET_SCALE=2 python test_import_time.py   # slower machines
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# module -> import time budget in ms (cumulative, as reported by -X importtime)
+BUDGETS_MS = {
+    'config': 20,
+    'main': 250,
+    'server': 600,  # Flask itself is most of this
+}
+HEAVY_MODULES = ('cv2', 'numpy', 'PIL', 'paddle', 'paddleocr', 'easyocr', 'torch')
+
+
+def measure(module: str):
+    """Return (cumulative import time in ms, imported top-level modules, files created)"""
+    with tempfile.TemporaryDirectory() as cwd:
+        env = dict(os.environ, OCR_WARMUP='0', JOB_WORKERS='0', PYTHONPATH=ROOT)
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                              cwd=cwd, env=env, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+        created = os.listdir(cwd)
+
+    total_us = 0
+    imported = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        imported.add(name.strip().split('.')[0])
+        if name.strip() == module:
+            total_us = int(cumulative)
+    return total_us / 1000, imported, created
+
+
+def main() -> int:
+    scale = float(os.environ.get('IMPORT_BUDGET_SCALE', '1'))
+    failures = []
+    for module, budget in BUDGETS_MS.items():
+        # The first run may compile .pyc files; the second one is what users see
+        try:
+            measure(module)
+            elapsed, imported, created = measure(module)
+        except RuntimeError as e:
+            print(f"[SKIP] {module}: {e}")
+            continue
+        heavy = sorted(m for m in HEAVY_MODULES if m in imported)
+        ok = elapsed <= budget * scale and not heavy and not created
+        print(f"[{'OK' if ok else 'FAIL'}] import {module}: {elapsed:.1f} ms (budget {budget * scale:.0f} ms)"
+              + (f", heavy imports: {', '.join(heavy)}" if heavy else "")
+              + (f", created: {', '.join(created)}" if created else ""))
+        if not ok:
+            failures.append(module)
+
+    if failures:
+        print(f"[ERROR] Import budget exceeded: {', '.join(failures)}")
+        return 1
+    print("[OK] All entry points import within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
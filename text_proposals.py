@@ -0,0 +1,143 @@
+"""
+Cheap text-region proposals for sparse drawings
+Most of an equipment drawing is line art. A few classical-CV passes on the
+grayscale image (ink mask, morphological removal of long lines, glyph-sized
+connected components, horizontal closing) find the handful of regions that can contain text, so the
+OCR engine only has to recognize those crops instead of running its detector
+over the whole frame.
+"""
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+Box = Tuple[int, int, int, int]  # x0, y0, x1, y1
+
+# Proposal sets that cover more of the frame than this save nothing
+MAX_COVERAGE = 0.35
+MAX_PROPOSALS = 80
+
+
+def propose_text_regions(gray: np.ndarray, min_height: int = 6, pad: int = 4,
+                         work_size: int = 1600) -> List[Box]:
+    """
+    Candidate text-line boxes in page coordinates, in reading order
+    Large pages are analysed at `work_size` pixels on the shorter side.
+    """
+    height, width = gray.shape[:2]
+    factor = min(1.0, work_size / float(min(height, width)))
+    small = gray if factor == 1.0 else cv2.resize(gray, None, fx=factor, fy=factor, interpolation=cv2.INTER_AREA)
+    min_h = max(3, int(round(min_height * factor)))
+    max_h = max(40, int(0.08 * min(small.shape[:2])))
+
+    # Ink mask; the blur keeps sensor noise out and the polarity follows the page
+    small = cv2.GaussianBlur(small, (3, 3), 0)
+    _, binary = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    if cv2.countNonZero(binary) > binary.size // 2:
+        binary = cv2.bitwise_not(binary)
+
+    # Cut long horizontal/vertical lines away so labels touching a dimension line come loose
+    line_length = 2 * max_h
+    lines = cv2.morphologyEx(binary, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (line_length, 1)))
+    lines |= cv2.morphologyEx(binary, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (1, line_length)))
+    binary = cv2.subtract(binary, lines)
+
+    # Keep glyph-sized components; outlines, curves and arrows form large
+    # connected shapes and speckles tiny ones
+    count, labels, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    w, h = stats[:, cv2.CC_STAT_WIDTH], stats[:, cv2.CC_STAT_HEIGHT]
+    glyph = (np.maximum(w, h) <= max_h) & (np.maximum(w, h) >= min_h)
+    glyph[0] = False
+    glyphs = np.where(glyph[labels], 255, 0).astype(np.uint8)
+
+    # Join the glyphs of a word/line (including word spaces) into one component
+    glyph_heights = h[glyph]
+    join = max(5, int(round(0.9 * np.percentile(glyph_heights, 75)))) if len(glyph_heights) else 5
+    joined = cv2.morphologyEx(glyphs, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (join, 3)))
+    count, _, stats, _ = cv2.connectedComponentsWithStats(joined, connectivity=8)
+
+    boxes = []
+    for x, y, bw, bh, area in stats[1:count]:
+        short, long = min(bw, bh), max(bw, bh)
+        # A lone glyph is not a label; dimension text has at least two characters
+        if short < min_h or short > max_h or long < 1.5 * short:
+            continue
+        x0, y0 = int(x / factor) - pad, int(y / factor) - pad
+        x1, y1 = int(np.ceil((x + bw) / factor)) + pad, int(np.ceil((y + bh) / factor)) + pad
+        boxes.append((max(0, x0), max(0, y0), min(width, x1), min(height, y1)))
+    return _merge_overlapping(boxes)
+
+
+def _merge_overlapping(boxes: List[Box]) -> List[Box]:
+    merged = True
+    while merged:
+        merged = False
+        result = []
+        for box in boxes:
+            for i, other in enumerate(result):
+                if box[0] < other[2] and other[0] < box[2] and box[1] < other[3] and other[1] < box[3]:
+                    result[i] = (min(box[0], other[0]), min(box[1], other[1]),
+                                 max(box[2], other[2]), max(box[3], other[3]))
+                    merged = True
+                    break
+            else:
+                result.append(box)
+        boxes = result
+    return sorted(boxes, key=lambda b: (b[1], b[0]))
+
+
+def proposals_reliable(boxes: List[Box], image_shape: Tuple[int, ...]) -> bool:
+    """
+    Whether proposals are worth using instead of full-frame OCR
+    Nothing found, or so many/so large regions that the page is not sparse
+    (photos, dense tables), means full-frame detection should run instead.
+    """
+    if not boxes or len(boxes) > MAX_PROPOSALS:
+        return False
+    covered = sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in boxes)
+    return covered <= MAX_COVERAGE * image_shape[0] * image_shape[1]
+
+
+def crop_regions(img: np.ndarray, boxes: List[Box]) -> List[np.ndarray]:
+    """
+    Crops for recognition; tall crops (vertical labels) are turned upright like PaddleOCR does
+    """
+    crops = []
+    for x0, y0, x1, y1 in boxes:
+        crop = np.ascontiguousarray(img[y0:y1, x0:x1])
+        if crop.shape[0] >= 1.5 * crop.shape[1]:
+            crop = cv2.rotate(crop, cv2.ROTATE_90_COUNTERCLOCKWISE)
+        crops.append(crop)
+    return crops
+
+
+def crop_quads(img: np.ndarray, quads: List[np.ndarray]) -> List[np.ndarray]:
+    """
+    Crops for detected (possibly rotated) text quadrilaterals, warped upright like PaddleOCR does
+    """
+    crops = []
+    for quad in quads:
+        quad = np.asarray(quad, dtype=np.float32).reshape(4, 2)
+        width = int(max(np.linalg.norm(quad[0] - quad[1]), np.linalg.norm(quad[2] - quad[3])))
+        height = int(max(np.linalg.norm(quad[0] - quad[3]), np.linalg.norm(quad[1] - quad[2])))
+        if width < 1 or height < 1:
+            crops.append(np.zeros((1, 1) + img.shape[2:], dtype=img.dtype))
+            continue
+        target = np.float32([[0, 0], [width, 0], [width, height], [0, height]])
+        crop = cv2.warpPerspective(img, cv2.getPerspectiveTransform(quad, target), (width, height),
+                                   borderMode=cv2.BORDER_REPLICATE, flags=cv2.INTER_CUBIC)
+        if crop.shape[0] >= 1.5 * crop.shape[1]:
+            crop = cv2.rotate(crop, cv2.ROTATE_90_COUNTERCLOCKWISE)
+        crops.append(crop)
+    return crops
+
+
+def box_points(box: Box) -> List[List[float]]:
+    x0, y0, x1, y1 = box
+    return [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]
+
+
+def to_gray(img: np.ndarray, gray: Optional[np.ndarray] = None) -> np.ndarray:
+    if gray is not None:
+        return gray
+    return img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
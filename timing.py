@@ -0,0 +1,119 @@
+"""
+Lightweight per-stage timing spans
+A StageTimer collects the spans of one image. Code marks stages with
+`with span("ocr"):`, which costs almost nothing when no timer is active on the
+current thread. Spans are stored as absolute wall-clock microseconds, so timers
+from worker processes can be merged and a whole batch exported as a Chrome trace
+(chrome://tracing or https://ui.perfetto.dev).
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List
+
+_local = threading.local()
+
+
+class StageTimer:
+    """
+    Spans recorded for one image: [name, start_us, duration_us, pid, tid]
+    """
+    def __init__(self):
+        self.spans: List[list] = []
+        self._wall0_ns = time.time_ns()
+        self._perf0_ns = time.perf_counter_ns()
+
+    def add(self, name: str, start_ns: int, end_ns: int):
+        start_us = (self._wall0_ns + start_ns - self._perf0_ns) // 1000
+        self.spans.append([name, start_us, (end_ns - start_ns) // 1000,
+                           os.getpid(), threading.get_ident()])
+
+    def extend(self, spans: List[list]):
+        """
+        Merge spans recorded by another timer (e.g. in an OCR worker process)
+        """
+        self.spans.extend(spans)
+
+    @contextmanager
+    def activate(self):
+        """
+        Make this the timer that span() records into on the current thread
+        """
+        previous = getattr(_local, 'timer', None)
+        _local.timer = self
+        try:
+            yield self
+        finally:
+            _local.timer = previous
+
+    def as_dict(self) -> Dict:
+        """
+        JSON-friendly summary: per-stage totals plus the raw spans
+        """
+        stages = {}
+        for name, _, duration_us, _, _ in self.spans:
+            stages[name] = stages.get(name, 0) + duration_us
+        wall_ms = 0.0
+        if self.spans:
+            start = min(s[1] for s in self.spans)
+            end = max(s[1] + s[2] for s in self.spans)
+            wall_ms = (end - start) / 1000
+        return {
+            'wall_ms': round(wall_ms, 3),
+            'stages_ms': {name: round(us / 1000, 3) for name, us in stages.items()},
+            'spans': self.spans,
+        }
+
+
+class span:
+    """
+    Time a block into the thread's active StageTimer, if any
+    """
+    __slots__ = ('name', 'timer', 'start')
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.timer = getattr(_local, 'timer', None)
+        if self.timer is not None:
+            self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.timer is not None:
+            self.timer.add(self.name, self.start, time.perf_counter_ns())
+        return False
+
+
+def format_stages(timings: Dict) -> str:
+    """
+    One-line summary of the top-level stages, for console output
+    """
+    stages = timings.get('stages_ms', {})
+    parts = [f"{name} {ms:.0f}ms" for name, ms in stages.items() if '.' not in name]
+    return f"{timings.get('wall_ms', 0):.0f}ms total (" + ", ".join(parts) + ")"
+
+
+def write_chrome_trace(results: Iterable[Dict], output_path: str) -> int:
+    """
+    Export the spans of every result as a Chrome trace-event JSON file
+    results may be any iterable (e.g. iter_jsonl), events are streamed to disk.
+    Returns the number of events written.
+    """
+    count = 0
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write('{"traceEvents": [\n')
+        for result in results:
+            timings = result.get('timings') or {}
+            image = os.path.basename(result.get('image_path', ''))
+            for name, start_us, duration_us, pid, tid in timings.get('spans', []):
+                event = {'name': name, 'cat': 'pipeline', 'ph': 'X', 'ts': start_us,
+                         'dur': duration_us, 'pid': pid, 'tid': tid, 'args': {'image': image}}
+                f.write((",\n" if count else "") + json.dumps(event, ensure_ascii=False))
+                count += 1
+        f.write('\n], "displayTimeUnit": "ms"}\n')
+    print(f"✓ Trace with {count} span(s) saved to: {output_path}")
+    return count
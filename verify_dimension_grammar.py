@@ -0,0 +1,189 @@
+"""
+Verify the compiled dimension grammar against the legacy regex loop
+Generates a large corpus of OCR-like strings (drawing labels, captions
+without numbers, and mixed lines with units in any case, A x B x C tuples,
+Ø/φ markers, Korean unit words, confidence scores in parentheses, O/l/I
+confusions), checks that dimension_grammar.parse_dimensions returns
+exactly what the old parser returned, and times both.
+
+    python verify_dimension_grammar.py --lines 50000
+"""
+import argparse
+import random
+import re
+import sys
+import time
+from typing import Dict, List
+
+from dimension_grammar import LEGACY_PATTERNS, parse_dimensions
+
+LEGACY_KEYS = ('value', 'value_mm', 'unit', 'original_text', 'confidence', 'bbox', 'full_match')
+
+
+def legacy_parse_dimensions(extracted_data: List[Dict]) -> List[Dict]:
+    """
+    The parser OCRDetector used before the grammar (kept verbatim as reference)
+    """
+    dimensions = []
+    seen_dimensions = set()
+    for item in extracted_data:
+        text = item['text']
+        original_text = text
+        text_clean = text.replace('O', '0').replace('o', '0')
+        text_clean = text_clean.replace('l', '1').replace('I', '1')
+        for pattern in LEGACY_PATTERNS:
+            for match in re.finditer(pattern, text_clean, re.IGNORECASE):
+                groups = match.groups()
+                if len(groups) >= 1:
+                    try:
+                        value = float(groups[0])
+                        if value < 2.0:
+                            match_text = match.group()
+                            if '(' in original_text and ')' in original_text:
+                                match_start = original_text.find(match_text)
+                                if match_start > 0 and original_text[match_start-1] == '(':
+                                    continue
+                        unit = None
+                        for g in groups[1:]:
+                            if g and g.lower() in ['cm', 'mm', 'm', 'centimeter', 'millimeter', 'meter']:
+                                if 'centimeter' in g.lower() or g.lower() == 'cm':
+                                    unit = 'cm'
+                                elif 'millimeter' in g.lower() or g.lower() == 'mm':
+                                    unit = 'mm'
+                                elif 'meter' in g.lower() or g.lower() == 'm':
+                                    unit = 'm'
+                                break
+                        if unit is None:
+                            unit = 'cm' if value < 1000 else 'mm'
+                        if unit == 'm':
+                            value_mm = value * 1000
+                        elif unit == 'cm':
+                            value_mm = value * 10
+                        else:
+                            value_mm = value
+                        dim_key = (round(value_mm, 1), unit)
+                        if dim_key not in seen_dimensions:
+                            seen_dimensions.add(dim_key)
+                            dimensions.append({
+                                'value': value,
+                                'value_mm': value_mm,
+                                'unit': unit,
+                                'original_text': original_text,
+                                'confidence': item['confidence'],
+                                'bbox': item['bbox'],
+                                'full_match': match.group()
+                            })
+                    except (ValueError, IndexError):
+                        continue
+    dimensions.sort(key=lambda x: x['confidence'], reverse=True)
+    return dimensions
+
+
+_UNITS = ['mm', 'cm', 'm', 'MM', 'CM', 'M', 'Mm', 'cM', 'millimeter', 'centimeter', 'meter', 'METER',
+          '밀리', '밀리미터', '센티', '센티미터', '미터', '']
+_SEPARATORS = [' x ', 'x', ' X ', '×', ' × ', '*', ' by ', '-']
+_WORDS = ['높이', '지름', '직경', '폭', 'H', 'W', 'D', 'R', 'L', 'Ø', 'φ', '⌀', 'dia', 'Total', 'scale 1:10',
+          'rev', 'No.', 'Io', 'Ol', 'mm', 'cm', '(', ')', ':', '=', '~', '±', '/']
+
+
+def _number(rng: random.Random) -> str:
+    kind = rng.random()
+    if kind < 0.35:
+        return str(rng.randint(0, 2500))
+    if kind < 0.6:
+        return f"{rng.uniform(0, 3000):.{rng.randint(1, 2)}f}"
+    if kind < 0.7:
+        return f"{rng.uniform(0, 2):.2f}"
+    if kind < 0.8:
+        # OCR confusions inside numbers
+        digits = str(rng.randint(10, 9999))
+        return ''.join(rng.choice({'0': 'Oo0', '1': 'lI1'}.get(c, c)) for c in digits)
+    if kind < 0.85:
+        return str(rng.randint(0, 999)) + '.'
+    if kind < 0.9:
+        return '٣' + str(rng.randint(0, 99))  # Unicode digits are digits to \d and float()
+    return str(rng.randint(0, 99999))
+
+
+def _token(rng: random.Random) -> str:
+    kind = rng.random()
+    if kind < 0.45:
+        return _number(rng) + rng.choice(['', ' ']) + rng.choice(_UNITS)
+    if kind < 0.65:
+        parts = [_number(rng) for _ in range(rng.randint(2, 3))]
+        return rng.choice(_SEPARATORS).join(parts) + rng.choice(['', ' ']) + rng.choice(_UNITS)
+    if kind < 0.75:
+        return f"({_number(rng)})"
+    if kind < 0.85:
+        return rng.choice(['Ø', 'φ', 'Ø ']) + _number(rng)
+    return rng.choice(_WORDS)
+
+
+def _line(rng: random.Random) -> str:
+    kind = rng.random()
+    if kind < 0.3:
+        # Labels as they appear on drawings: "330mm", "58.8 cm", "Ø600", "570"
+        return rng.choice(['{}mm', '{} mm', '{} cm', 'Ø{}', '{}', 'H {}']).format(_number(rng))
+    if kind < 0.45:
+        # Title block, notes and Korean captions without numbers
+        return rng.choice(['측면도', '정면도', 'SECTION A-A', 'NOTE', '재질: SUS304', 'DRAWN BY', 'Lid'])
+    return rng.choice(['', ' ']).join(_token(rng) for _ in range(rng.randint(1, 5)))
+
+
+def make_corpus(lines: int, seed: int = 0) -> List[List[Dict]]:
+    """
+    Detection lists as extract_text returns them (1-6 text lines per image)
+    """
+    rng = random.Random(seed)
+    corpus = []
+    made = 0
+    while made < lines:
+        count = min(rng.randint(1, 6), lines - made)
+        corpus.append([{
+            'text': _line(rng),
+            'confidence': round(rng.uniform(0.5, 1.0), 2),
+            'bbox': [[0, 0], [10, 0], [10, 5], [0, 5]],
+        } for _ in range(count)])
+        made += count
+    return corpus
+
+
+def _timed(func, corpus) -> float:
+    start = time.perf_counter()
+    for detections in corpus:
+        func(detections)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the dimension grammar against the legacy parser')
+    parser.add_argument('--lines', type=int, default=50000, help='OCR text lines in the corpus')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3, help='Timing repetitions (best is reported)')
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.lines, args.seed)
+    print(f"Corpus: {args.lines} text lines in {len(corpus)} detection lists")
+
+    mismatches = 0
+    for detections in corpus:
+        expected = legacy_parse_dimensions(detections)
+        found = [{k: d[k] for k in LEGACY_KEYS} for d in parse_dimensions(detections)]
+        if found != expected:
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"[MISMATCH] {[d['text'] for d in detections]}")
+                print(f"  legacy:  {[(d['value'], d['unit'], d['full_match']) for d in expected]}")
+                print(f"  grammar: {[(d['value'], d['unit'], d['full_match']) for d in found]}")
+    print(f"Parity: {len(corpus) - mismatches}/{len(corpus)} detection lists identical")
+
+    legacy_s = min(_timed(legacy_parse_dimensions, corpus) for _ in range(args.repeat))
+    grammar_s = min(_timed(parse_dimensions, corpus) for _ in range(args.repeat))
+    print(f"Legacy regex loop: {legacy_s * 1000:9.1f} ms  ({args.lines / legacy_s:,.0f} lines/s)")
+    print(f"Compiled grammar:  {grammar_s * 1000:9.1f} ms  ({args.lines / grammar_s:,.0f} lines/s)")
+    print(f"Speed-up: {legacy_s / grammar_s:.2f}x")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
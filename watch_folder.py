@@ -0,0 +1,144 @@
+"""
+Watch-folder daemon: keeps one warm IndustrialToolAnalyzer and processes
+images as they are dropped into input_images
+Files are debounced on size/mtime so partially written files are left alone
+until the writer has finished. If the optional `watchdog` package is installed
+its file-system events (inotify, FSEvents, ReadDirectoryChangesW) wake the loop
+immediately; otherwise the folder is polled.
+"""
+import os
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from config import INPUT_DIR, RESULTS_DIR, MANIFEST_PATH
+
+
+class FolderWatcher:
+    """
+    Reports image files that are new or modified and have stopped changing
+    """
+    def __init__(self, input_dir: str, settle_time: float = 0.5, extensions=None):
+        self.input_dir = input_dir
+        self.settle_time = settle_time
+        self.extensions = extensions or ['.jpg', '.jpeg', '.png', '.bmp', '.tiff']
+        # path -> (size, mtime_ns, time the signature was first seen)
+        self._pending: Dict[str, Tuple[int, int, float]] = {}
+        # path -> (size, mtime_ns) of the version already handed out
+        self._handled: Dict[str, Tuple[int, int]] = {}
+
+    def poll(self) -> List[str]:
+        """
+        Scan the folder once and return paths that are ready to process
+        """
+        now = time.monotonic()
+        ready = []
+        seen = set()
+        try:
+            entries = list(os.scandir(self.input_dir))
+        except FileNotFoundError:
+            return []
+        for entry in entries:
+            if not entry.is_file() or not any(entry.name.lower().endswith(ext) for ext in self.extensions):
+                continue
+            try:
+                st = entry.stat()
+            except OSError:
+                continue  # Deleted or renamed while scanning
+            path = entry.path
+            seen.add(path)
+            signature = (st.st_size, st.st_mtime_ns)
+            if st.st_size == 0 or self._handled.get(path) == signature:
+                continue
+            pending = self._pending.get(path)
+            if pending is None or pending[:2] != signature:
+                # New file or still being written: restart the settle timer
+                self._pending[path] = (signature[0], signature[1], now)
+            elif now - pending[2] >= self.settle_time:
+                del self._pending[path]
+                self._handled[path] = signature
+                ready.append(path)
+        for path in list(self._pending):
+            if path not in seen:
+                del self._pending[path]
+        return sorted(ready)
+
+
+def _start_event_wakeup(input_dir: str, wakeup: threading.Event):
+    """
+    Wake the loop on file-system events when watchdog is available
+    """
+    try:
+        from watchdog.observers import Observer
+        from watchdog.events import FileSystemEventHandler
+    except ImportError:
+        return None
+
+    class _Handler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            wakeup.set()
+
+    observer = Observer()
+    observer.schedule(_Handler(), input_dir, recursive=False)
+    observer.daemon = True
+    observer.start()
+    return observer
+
+
+def run_daemon(input_dir: str = INPUT_DIR, poll_interval: float = 0.25, settle_time: float = 0.5,
+               results_file: str = "watch_results.jsonl", backend: str = None):
+    """
+    Process new drops into output_images/results until interrupted (Ctrl+C)
+    Results are appended to results/<results_file>; the manifest makes restarts
+    skip images that were already processed.
+    """
+    from main import IndustrialToolAnalyzer
+    from result_writer import JSONLResultWriter
+    from run_manifest import RunManifest, pipeline_fingerprint
+
+    os.makedirs(input_dir, exist_ok=True)
+    print("Loading OCR model (once for the whole session)...")
+    analyzer = IndustrialToolAnalyzer(backend=backend)
+    manifest = RunManifest(MANIFEST_PATH, pipeline_fingerprint(backend))
+    watcher = FolderWatcher(input_dir, settle_time=settle_time)
+    wakeup = threading.Event()
+    observer = _start_event_wakeup(input_dir, wakeup)
+    mode = "file-system events" if observer is not None else "polling"
+
+    print(f"Watching '{input_dir}' ({mode}). Drop images in to process them; Ctrl+C to stop.")
+    writer = JSONLResultWriter(os.path.join(RESULTS_DIR, results_file), append=True, fsync_every=1)
+    try:
+        while True:
+            for image_path in watcher.poll():
+                try:
+                    cached, state = manifest.check(image_path)
+                    if cached is not None:
+                        print(f"[SKIP] Unchanged: {image_path}")
+                        continue
+                    result = analyzer.process_image(image_path, os.path.basename(image_path))
+                    if result:
+                        manifest.record(image_path, state, result)
+                        writer.write(result)
+                except Exception as e:
+                    print(f"[ERROR] {image_path}: {e}")
+            # Events cut the wait short; the timeout keeps the settle timers ticking
+            wakeup.wait(poll_interval)
+            wakeup.clear()
+    except KeyboardInterrupt:
+        print("\nStopping watcher...")
+    finally:
+        if observer is not None:
+            observer.stop()
+        writer.close()
+        manifest.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='Process images as they are dropped into a folder')
+    parser.add_argument('--dir', type=str, default=INPUT_DIR, help='Folder to watch')
+    parser.add_argument('--poll-interval', type=float, default=0.25, help='Seconds between scans')
+    parser.add_argument('--settle-time', type=float, default=0.5,
+                        help='Seconds a file must stay unchanged before it is processed')
+    args = parser.parse_args()
+    run_daemon(args.dir, args.poll_interval, args.settle_time)